@@ -1,10 +1,12 @@
+import cProfile
 import json
-from pathlib import Path
+import os
+import time
 
-from flask import Flask, abort, current_app, request
+from flask import Flask, Response, abort, g, request, url_for
 from markupsafe import escape
 
-from . import cli, common
+from . import cli, common, engine, jobs, live, metrics
 
 __author__ = "Alex Noerdemann"
 __license__ = "GNU GPL v3"
@@ -16,24 +18,212 @@ __status__ = "Development"
 def create_app():
     """Create and configure an instance of the Flask application."""
     app = Flask(__name__)
+    app.config.from_mapping(
+        MATCH_URL_TEMPLATE=common.MATCH_URL_TEMPLATE,
+        # Overrides of the Scrapy project settings, e.g. SPIDER_ALLOWED_DOMAINS of a local HLTV stub.
+        CRAWL_SETTINGS=dict(),
+        JOB_WORKERS=4,
+        JOB_QUEUE_DEPTH=32,
+        JOB_RESULT_TTL=600,
+        JOB_MAX_WAIT=30,
+        RESULT_CACHE_PATH=os.path.join(app.instance_path, "result_cache.sqlite3"),
+        RESULT_CACHE_MAX_BYTES=256 * 1024 * 1024,
+        RESULT_CACHE_LIVE_TTL=30,
+        LIVE_POLL_INTERVAL=20,
+        LIVE_KEEPALIVE=15,
+        ROUND_MODEL_PATH=os.path.join(app.instance_path, "round_model.npz"),
+        PREDICT_MAX_MATCHES=1000,
+        RATINGS_PATH=os.path.join(app.instance_path, "ratings.sqlite3"),
+        SIMULATIONS=1_000_000,
+        SIMULATION_WORKERS=1,
+        SIMULATION_CACHE_SIZE=1024,
+        METRICS_TIMING_HEADER=False,
+        PROFILING_ENABLED=False,
+        PROFILE_PATH=os.path.join(app.instance_path, "profiles"),
+    )
+    app.config.from_prefixed_env()
+    os.makedirs(app.instance_path, exist_ok=True)
+
+    common.init_crawl(app.config["MATCH_URL_TEMPLATE"], app.config["CRAWL_SETTINGS"])
+    common.init_result_cache(
+        app.config["RESULT_CACHE_PATH"],
+        max_bytes=app.config["RESULT_CACHE_MAX_BYTES"],
+        live_ttl=app.config["RESULT_CACHE_LIVE_TTL"],
+    )
+
+    common.init_round_model(app.config["ROUND_MODEL_PATH"])
+    common.init_ratings(app.config["RATINGS_PATH"])
+    common.init_simulation_cache(app.config["SIMULATION_CACHE_SIZE"])
 
     cli.init(app)
 
+    job_queue = jobs.JobQueue(
+        common.parse_match,
+        max_workers=app.config["JOB_WORKERS"],
+        max_queued=app.config["JOB_QUEUE_DEPTH"],
+        result_ttl=app.config["JOB_RESULT_TTL"],
+    )
+    app.extensions["hmp_jobs"] = job_queue
+    live_tracker = live.LiveTracker(interval=app.config["LIVE_POLL_INTERVAL"])
+    app.extensions["hmp_live"] = live_tracker
+
+    @app.before_request
+    def start_request():
+        g.hmp_request_start = time.perf_counter()
+        # Profiling toggle: A single request with "?profile=1" is profiled, if profiling is enabled.
+        if app.config["PROFILING_ENABLED"] and request.args.get("profile") == "1":
+            g.hmp_profile = cProfile.Profile()
+            g.hmp_profile.enable()
+
+    @app.after_request
+    def finish_request(response):
+        profile = g.pop("hmp_profile", None)
+        if profile is not None:
+            profile.disable()
+            os.makedirs(app.config["PROFILE_PATH"], exist_ok=True)
+            profile_path = os.path.join(
+                app.config["PROFILE_PATH"],
+                f"{time.strftime('%Y%m%d-%H%M%S')}-{request.endpoint}-{os.getpid()}.prof",
+            )
+            profile.dump_stats(profile_path)
+            response.headers["X-Profile-Path"] = profile_path
+
+        endpoint = request.endpoint or "unknown"
+        metrics.http_requests.inc(endpoint=endpoint, status=response.status_code)
+        metrics.http_request_seconds.observe(
+            time.perf_counter() - g.hmp_request_start, endpoint=endpoint
+        )
+        if app.config["METRICS_TIMING_HEADER"]:
+            response.headers["Server-Timing"] = metrics.get_server_timing()
+        return response
+
+    def get_refresh_flag() -> bool:
+        return request.values.get("refresh", "").lower() in {"1", "true", "on"}
+
     @app.route("/", methods=["GET", "POST"])
     def index():
         if request.method == "POST":
             user_input = escape(request.form["match-url"])
-            output_path = Path(current_app.instance_path + "/parsed_match.json")
-            common.parse_match(user_input, output_path.as_uri())
             try:
-                with open(output_path) as output:
-                    return json.dumps(json.load(output))
-            except (json.JSONDecodeError, OSError, TypeError):
+                items = common.parse_match(str(user_input), refresh=get_refresh_flag())
+            except engine.CrawlError:
                 abort(500, "Could not parse/handle the given HLTV match.")
+            with metrics.timed("serialize"):
+                return json.dumps(items)
         else:
             return (
                 "<h1>Hello, HMP!</h1>"
                 '<form method="POST"><input name="match-url"><input type="submit"></form>'
             )
 
+    @app.get("/matches/<int:match_id>/stream")
+    def stream_match(match_id):
+        # NDJSON: One line per fragment, sent as soon as the spider scraped it.
+        url = common.MATCH_URL_TEMPLATE.format(match_id=match_id)
+        refresh = get_refresh_flag()
+
+        def generate():
+            try:
+                for item in common.stream_match(url, refresh=refresh):
+                    yield json.dumps(item) + "\n"
+            except engine.CrawlError:
+                # The status was already sent with the first fragment, so the error is reported in-band.
+                yield json.dumps(
+                    {"error": "Could not parse/handle the given HLTV match."}
+                ) + "\n"
+
+        return Response(
+            generate(),
+            mimetype="application/x-ndjson",
+            headers={"X-Accel-Buffering": "no"},
+        )
+
+    @app.post("/jobs")
+    def submit_job():
+        user_input = escape(request.form["match-url"])
+        try:
+            job = job_queue.submit(str(user_input), refresh=get_refresh_flag())
+        except jobs.JobQueueFull:
+            abort(503, "Too many crawl jobs are pending, please try again later.")
+        return job.to_dict(), 202, {"Location": url_for("get_job", job_id=job.id)}
+
+    @app.get("/jobs/<job_id>")
+    def get_job(job_id):
+        job = job_queue.get(job_id)
+        if job is None:
+            abort(404, "Unknown crawl job.")
+        # Long-polling: Hold the request until the job is done or the (capped) waiting time ran out.
+        wait = min(request.args.get("wait", 0, type=float), app.config["JOB_MAX_WAIT"])
+        if wait > 0:
+            job.wait(wait)
+        return job.to_dict()
+
+    @app.get("/live/<int:match_id>/events")
+    def live_events(match_id):
+        # Server-Sent Events: A snapshot of the live map first, then only the new rounds and score changes.
+        url = common.MATCH_URL_TEMPLATE.format(match_id=match_id)
+        return Response(
+            live_tracker.stream(url, keepalive=app.config["LIVE_KEEPALIVE"]),
+            mimetype="text/event-stream",
+            headers={"Cache-Control": "no-cache", "X-Accel-Buffering": "no"},
+        )
+
+    @app.post("/predict")
+    def predict():
+        # The match ids are either a JSON list or repeated form values.
+        if request.is_json:
+            match_ids = (request.get_json(silent=True) or dict()).get("match_ids")
+        else:
+            match_ids = request.form.getlist("match_id")
+        try:
+            match_ids = [int(match_id) for match_id in match_ids or list()]
+        except (TypeError, ValueError):
+            abort(400, "The match ids have to be integers.")
+        if not match_ids:
+            abort(400, "No match ids were given.")
+        if len(match_ids) > app.config["PREDICT_MAX_MATCHES"]:
+            abort(413, "Too many match ids were given.")
+
+        with metrics.timed("store_lookup"):
+            records, missing = common.get_match_records(match_ids)
+        # NumPy is only imported by the first prediction, so the app starts without it.
+        from predict.model import predict_matches
+
+        with metrics.timed("predict"):
+            predictions = predict_matches(common.get_round_model(), records)
+        return {
+            "predictions": {str(key): value for key, value in predictions.items()},
+            "ratings": {
+                str(record["match_id"]): common.ratings.get_ratings(
+                    record.get("teams") or dict()
+                )
+                for record in records
+            },
+            "missing": missing,
+        }
+
+    @app.get("/simulate/<int:match_id>")
+    def simulate_match(match_id):
+        url = common.MATCH_URL_TEMPLATE.format(match_id=match_id)
+        try:
+            return common.simulate_match(
+                url,
+                simulations=app.config["SIMULATIONS"],
+                workers=app.config["SIMULATION_WORKERS"],
+            )
+        except engine.CrawlError:
+            abort(500, "Could not parse/handle the given HLTV match.")
+
+    @app.get("/metrics")
+    def get_metrics():
+        return Response(metrics.registry.render(), mimetype="text/plain; version=0.0.4")
+
+    @app.get("/stats")
+    def stats():
+        return {
+            "crawls_in_flight": common.match_crawls.in_flight,
+            "coalesced_requests": common.match_crawls.coalesced,
+            "live_matches": live_tracker.match_count,
+        }
+
     return app
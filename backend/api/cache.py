@@ -0,0 +1,124 @@
+import json
+import sqlite3
+import threading
+import time
+import zlib
+from collections import OrderedDict
+
+from predict.series import is_finished
+from scrape.scrape.compact import pack_fragments, unpack_fragments
+
+
+def get_result_ttl(items: list[dict], live_ttl: float) -> float | None:
+    """Returns how long the parsed match stays fresh, where ``None`` means forever.
+
+    Only finished matches (see ``predict.series.is_finished``) will never change again, including a series, which was
+    decided before its last map. Any other match is still live or about to start.
+    """
+    record = {
+        "teams": next((item["teams"] for item in items if "teams" in item), None),
+        "best_of": next((item["best-of"] for item in items if "best-of" in item), None),
+        "map_results": [item["map_result"] for item in items if "map_result" in item],
+    }
+    return None if is_finished(record) else live_ttl
+
+
+class ResultCache:
+    """On-disk cache of parsed matches keyed by their match id, bounded in size by evicting the least recently used.
+
+    The map results of the cached fragments are stored in their compact encoding (see ``scrape.scrape.compact``).
+    """
+
+    def __init__(self, path, max_bytes: int, live_ttl: float) -> None:
+        self.max_bytes = max_bytes
+        self.live_ttl = live_ttl
+        self._lock = threading.Lock()
+        self._connection = sqlite3.connect(path, check_same_thread=False)
+        with self._connection:
+            self._connection.execute(
+                "CREATE TABLE IF NOT EXISTS results ("
+                "match_id INTEGER PRIMARY KEY, payload BLOB NOT NULL, size INTEGER NOT NULL, "
+                "expires_at REAL, accessed_at REAL NOT NULL)"
+            )
+            self._connection.execute(
+                "CREATE INDEX IF NOT EXISTS results_accessed_at ON results (accessed_at)"
+            )
+
+    def get(self, match_id: int) -> list[dict] | None:
+        now = time.time()
+        with self._lock, self._connection:
+            row = self._connection.execute(
+                "SELECT payload, expires_at FROM results WHERE match_id = ?",
+                (match_id,),
+            ).fetchone()
+            if row is None:
+                return None
+            payload, expires_at = row
+            if expires_at is not None and expires_at <= now:
+                self._connection.execute(
+                    "DELETE FROM results WHERE match_id = ?", (match_id,)
+                )
+                return None
+            self._connection.execute(
+                "UPDATE results SET accessed_at = ? WHERE match_id = ?",
+                (now, match_id),
+            )
+        return unpack_fragments(json.loads(zlib.decompress(payload)))
+
+    def set(self, match_id: int, items: list[dict]) -> None:
+        now = time.time()
+        ttl = get_result_ttl(items, self.live_ttl)
+        payload = zlib.compress(json.dumps(pack_fragments(items)).encode("utf-8"))
+        with self._lock, self._connection:
+            self._connection.execute(
+                "INSERT OR REPLACE INTO results VALUES (?, ?, ?, ?, ?)",
+                (
+                    match_id,
+                    payload,
+                    len(payload),
+                    None if ttl is None else now + ttl,
+                    now,
+                ),
+            )
+            self._evict()
+
+    def _evict(self) -> None:
+        (total_size,) = self._connection.execute(
+            "SELECT COALESCE(SUM(size), 0) FROM results"
+        ).fetchone()
+        if total_size <= self.max_bytes:
+            return
+        evicted_ids = list()
+        for match_id, size in self._connection.execute(
+            "SELECT match_id, size FROM results ORDER BY accessed_at"
+        ):
+            if total_size <= self.max_bytes:
+                break
+            evicted_ids.append((match_id,))
+            total_size -= size
+        self._connection.executemany(
+            "DELETE FROM results WHERE match_id = ?", evicted_ids
+        )
+
+
+class MemoryCache:
+    """Small in-memory cache, bounded in entries by evicting the least recently used."""
+
+    def __init__(self, max_entries: int) -> None:
+        self.max_entries = max_entries
+        self._entries: OrderedDict = OrderedDict()
+        self._lock = threading.Lock()
+
+    def get(self, key):
+        with self._lock:
+            value = self._entries.get(key)
+            if value is not None:
+                self._entries.move_to_end(key)
+            return value
+
+    def set(self, key, value) -> None:
+        with self._lock:
+            self._entries[key] = value
+            self._entries.move_to_end(key)
+            while len(self._entries) > self.max_entries:
+                self._entries.popitem(last=False)
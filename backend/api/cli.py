@@ -1,11 +1,191 @@
+import json
+import os
+
 import click
 
-from . import common
+from . import common, engine, ingest
 
 
 def init(app):
     @app.cli.command("parse-match")
     @click.argument("match_url", nargs=1)
     @click.argument("output_path", nargs=1)
-    def parse_match(match_url, output_path):
-        common.parse_match(match_url, output_path)
+    @click.option(
+        "--refresh", is_flag=True, help="Bypass the result cache and crawl again."
+    )
+    def parse_match(match_url, output_path, refresh):
+        items = common.parse_match(match_url, refresh=refresh)
+        with open(output_path, "w", encoding="utf-8") as output:
+            json.dump(items, output, ensure_ascii=False)
+
+    @app.cli.command("parse-matches")
+    @click.argument("output_path", nargs=1)
+    @click.option(
+        "--input",
+        "input_path",
+        type=click.Path(exists=True, dir_okay=False),
+        help="File with one match URL per line.",
+    )
+    @click.option(
+        "--range",
+        "id_range",
+        type=(int, int),
+        help="First and last match id (inclusive) to crawl.",
+    )
+    @click.option(
+        "--concurrency", default=4, show_default=True, help="Matches crawled at once."
+    )
+    @click.option(
+        "--checkpoint",
+        "checkpoint_path",
+        help="Progress file to resume from [default: OUTPUT_PATH.checkpoint].",
+    )
+    @click.option(
+        "--refresh", is_flag=True, help="Bypass the result cache and crawl again."
+    )
+    def parse_matches(
+        output_path, input_path, id_range, concurrency, checkpoint_path, refresh
+    ):
+        """Crawl many matches and append one assembled record per match to OUTPUT_PATH as JSONL."""
+        if (input_path is None) == (id_range is None):
+            raise click.UsageError("Pass exactly one of --input or --range.")
+        if input_path is not None:
+            urls = ingest.read_match_urls(input_path)
+        else:
+            urls = ingest.get_match_urls_of_range(*id_range)
+
+        checkpoint = ingest.Checkpoint(checkpoint_path or f"{output_path}.checkpoint")
+        try:
+            progress = ingest.ingest_matches(
+                urls,
+                output_path,
+                checkpoint,
+                concurrency=concurrency,
+                refresh=refresh,
+                report=lambda message: click.echo(message, err=True),
+            )
+        finally:
+            checkpoint.close()
+        click.echo(
+            f"Parsed {progress.finished - progress.failed} of {progress.total} matches.",
+            err=True,
+        )
+
+    @app.cli.command("discover-matches")
+    def discover_matches():
+        """Crawl the matches, which were listed on HLTV since the last run."""
+        match_ids = common.discover_matches()
+        click.echo(f"Discovered {len(match_ids)} new matches.", err=True)
+        for match_id in match_ids:
+            click.echo(match_id)
+
+    @app.cli.command("reparse")
+    @click.argument("output_path", nargs=1)
+    @click.option(
+        "--archive",
+        "archive_path",
+        type=click.Path(exists=True, dir_okay=False),
+        help="Page archive to re-parse [default: PAGE_ARCHIVE_PATH of the scrape project].",
+    )
+    @click.option(
+        "--workers", default=os.cpu_count(), show_default=True, help="Parse processes."
+    )
+    @click.option(
+        "--store", is_flag=True, help="Replace the records in the match store as well."
+    )
+    def reparse(output_path, archive_path, workers, store):
+        """Re-parse all archived pages with the current spider and write one record per match to OUTPUT_PATH as JSONL."""
+        from scrape.scrape import archive
+
+        if archive_path is None:
+            archive_path = engine.get_data_path("PAGE_ARCHIVE_PATH")
+        page_archive = archive.PageArchive(archive_path, read_only=True)
+        match_ids = list(page_archive.iter_match_ids())
+        page_archive.close()
+
+        match_store = common.get_match_store() if store else None
+        progress = ingest.Progress(len(match_ids))
+        try:
+            with open(output_path, "w", encoding="utf-8") as output:
+                for match_id, record, error in archive.reparse_archive(
+                    archive_path, match_ids, workers
+                ):
+                    progress.finished += 1
+                    if error is not None:
+                        click.echo(
+                            f"Could not re-parse match {match_id}: {error}", err=True
+                        )
+                    if record is None:
+                        progress.failed += 1
+                        continue
+                    output.write(json.dumps(record, ensure_ascii=False) + "\n")
+                    if match_store is not None:
+                        match_store.add(record)
+                    if progress.finished % 1000 == 0:
+                        click.echo(str(progress), err=True)
+        finally:
+            if match_store is not None:
+                match_store.close()
+        click.echo(str(progress), err=True)
+
+    @app.cli.command("predict")
+    @click.argument("match_ids", nargs=-1, type=int, required=True)
+    @click.option(
+        "--output", "output_path", help="Write the predictions to this JSON file."
+    )
+    def predict(match_ids, output_path):
+        """Predict the round win probabilities of all maps of the given, already stored matches."""
+        from predict.model import predict_matches
+
+        records, missing = common.get_match_records(list(match_ids))
+        for match_id in missing:
+            click.echo(f"Match {match_id} is not stored yet.", err=True)
+        predictions = predict_matches(common.get_round_model(), records)
+        if output_path is None:
+            click.echo(json.dumps(predictions, ensure_ascii=False))
+        else:
+            with open(output_path, "w", encoding="utf-8") as output:
+                json.dump(predictions, output, ensure_ascii=False)
+
+    @app.cli.command("train-model")
+    @click.option("--epochs", default=200, show_default=True)
+    def train(epochs):
+        """Fit the round model on all stored matches and save it to ROUND_MODEL_PATH."""
+        from predict.model import train_model
+
+        store = common.get_match_store()
+        try:
+            model = train_model(store.iter_records(), epochs=epochs)
+        finally:
+            store.close()
+        model.save(app.config["ROUND_MODEL_PATH"])
+        common.init_round_model(app.config["ROUND_MODEL_PATH"])
+        click.echo(f"Saved the round model to {app.config['ROUND_MODEL_PATH']}.")
+
+    @app.cli.command("rebuild-ratings")
+    def rebuild_ratings():
+        """Recompute all ratings from the stored matches in one streaming pass."""
+        store = common.get_match_store()
+        try:
+            rated = common.ratings.rebuild(store.iter_records())
+        finally:
+            store.close()
+        click.echo(f"Rated {rated} finished matches.")
+
+    @app.cli.command("export-dataset")
+    @click.argument("output_path", nargs=1)
+    @click.option(
+        "--unfinished", is_flag=True, help="Export matches, which are not finished yet."
+    )
+    def export_dataset(output_path, unfinished):
+        """Append the stored matches, which were not exported yet, to the columnar dataset at OUTPUT_PATH."""
+        from predict.dataset import Dataset
+
+        store = common.get_match_store()
+        try:
+            exported = Dataset(output_path).export(
+                store.iter_records(), finished_only=not unfinished
+            )
+        finally:
+            store.close()
+        click.echo(f"Exported {exported} matches.")
@@ -1,8 +1,99 @@
 import importlib.util
-import subprocess
+import threading
 from pathlib import Path
+from typing import TYPE_CHECKING
 
-from scrape.scrape.spiders import match
+from predict.ratings import RatingIndex
+from predict.series import get_first_half_teams, is_played_map
+from scrape.scrape.spiders.metadata import (
+    DISCOVERY_SPIDER_NAME,
+    MATCH_SPIDER_NAME,
+    parse_match_id,
+)
+from scrape.scrape.store import MatchStore
+
+from . import cache, engine, metrics, singleflight
+
+if TYPE_CHECKING:
+    from predict.model import RoundModel
+
+MATCH_URL_TEMPLATE = "https://www.hltv.org/matches/{match_id}/match"
+
+match_crawls = singleflight.SingleFlight()
+result_cache: cache.ResultCache | None = None
+round_model_path = None
+round_model: "RoundModel | None" = None
+round_model_lock = threading.Lock()
+ratings: RatingIndex | None = None
+series_simulations = singleflight.SingleFlight()
+simulation_cache: cache.MemoryCache | None = None
+
+
+def init_crawl(match_url_template: str, settings_overrides: dict | None) -> None:
+    """Points the crawls at the given match URLs and Scrapy settings, e.g. of a local HLTV stub."""
+    global MATCH_URL_TEMPLATE
+    MATCH_URL_TEMPLATE = match_url_template
+    engine.init_engine(settings_overrides or None)
+
+
+def init_result_cache(path, max_bytes: int, live_ttl: float) -> None:
+    global result_cache
+    result_cache = cache.ResultCache(path, max_bytes, live_ttl)
+
+
+def init_round_model(path) -> None:
+    """Sets the path of the round model, which is only loaded on its first use, so the app starts without NumPy."""
+    global round_model, round_model_path
+    with round_model_lock:
+        round_model_path = path
+        round_model = None
+
+
+def get_round_model() -> "RoundModel":
+    global round_model
+    with round_model_lock:
+        if round_model is None:
+            from predict.model import RoundModel
+
+            round_model = (
+                RoundModel.load(round_model_path)
+                if round_model_path is not None and Path(round_model_path).exists()
+                else RoundModel()
+            )
+        return round_model
+
+
+def init_ratings(path) -> None:
+    global ratings
+    ratings = RatingIndex(path)
+
+
+def init_simulation_cache(max_entries: int) -> None:
+    global simulation_cache
+    simulation_cache = cache.MemoryCache(max_entries)
+
+
+def get_match_store() -> MatchStore:
+    path = Path(engine.get_data_path("MATCH_STORE_PATH"))
+    path.parent.mkdir(parents=True, exist_ok=True)
+    return MatchStore(path)
+
+
+def get_match_records(match_ids: list[int]) -> tuple[list[dict], list[int]]:
+    """Returns the stored records of the given matches and the ids of the matches, which were not stored yet."""
+    store = get_match_store()
+    try:
+        records = list()
+        missing = list()
+        for match_id in match_ids:
+            record = store.get(match_id)
+            if record is None:
+                missing.append(match_id)
+            else:
+                records.append(record)
+        return records, missing
+    finally:
+        store.close()
 
 
 def get_module_parent_path(module_name: str):
@@ -10,18 +101,167 @@ def get_module_parent_path(module_name: str):
     return Path(spec.origin).parent
 
 
-def parse_match(url: str, output_path: str):
-    scrape_path = get_module_parent_path("scrape.scrape")
-    process = subprocess.Popen(
-        [
-            "scrapy",
-            "crawl",
-            match.MatchSpider.name,
-            "-a",
-            f"start_urls={url}",
-            "-O",
-            f"{output_path}",
-        ],
-        cwd=scrape_path,
+def get_match_key(url: str) -> int | str:
+    try:
+        return parse_match_id(url)
+    except ValueError:
+        return url
+
+
+def assemble_match(items: list[dict]) -> dict:
+    """Combines the fragments yielded by the match spider into one match record."""
+    # Scrapy is only imported, once a match is actually assembled, so the app starts without it.
+    from itemadapter import ItemAdapter
+    from scrape.scrape.items import MatchItem
+
+    return ItemAdapter(MatchItem.from_fragments(items)).asdict()
+
+
+def crawl_match(url: str, crawl_priority: str = "live") -> list[dict]:
+    with metrics.timed("crawl"):
+        items = engine.get_engine().crawl(
+            MATCH_SPIDER_NAME, start_urls=url, crawl_priority=crawl_priority
+        )
+    if not items:
+        raise engine.CrawlError(f"No items could be scraped from {url}.")
+    return items
+
+
+def store_crawled_match(match_key: int | str, items: list[dict]) -> None:
+    if result_cache is not None and isinstance(match_key, int):
+        with metrics.timed("cache_store"):
+            result_cache.set(match_key, items)
+    # Every newly crawled match updates the ratings once it is finished, instead of recomputing them later.
+    if ratings is not None:
+        ratings.add(assemble_match(items))
+
+
+def crawl_and_cache_match(
+    url: str, match_key: int | str, crawl_priority: str = "live"
+) -> list[dict]:
+    items = crawl_match(url, crawl_priority)
+    store_crawled_match(match_key, items)
+    return items
+
+
+def discover_matches() -> list[int]:
+    """Crawls the matches, which were listed since the last discovery run, and returns their ids."""
+    fragments_by_match = dict()
+    for item in engine.get_engine().crawl(DISCOVERY_SPIDER_NAME):
+        fragments_by_match.setdefault(item["match_id"], list()).append(item)
+    for match_id, items in fragments_by_match.items():
+        if result_cache is not None:
+            result_cache.set(match_id, items)
+        if ratings is not None:
+            ratings.add(assemble_match(items))
+    return list(fragments_by_match)
+
+
+def parse_match(
+    url: str, refresh: bool = False, crawl_priority: str = "live"
+) -> list[dict]:
+    match_key = get_match_key(url)
+    if result_cache is not None and isinstance(match_key, int) and not refresh:
+        with metrics.timed("cache_lookup"):
+            items = result_cache.get(match_key)
+        if items is not None:
+            return items
+
+    # Concurrent requests of the same match wait for the already running crawl instead of starting their own one.
+    return match_crawls.do(
+        match_key, crawl_and_cache_match, url, match_key, crawl_priority
     )
-    process.wait()
+
+
+def get_round_probability(record: dict, first_team: str | None) -> float:
+    """Returns the probability, that the first team wins the next round of the live map, as predicted by the model."""
+    from predict.features import RoundHistories, build_features
+    from predict.model import score_map_results
+
+    round_model = get_round_model()
+    for map_result in record["map_results"]:
+        if map_result["source"] == "SCOREBOARD" and is_played_map(map_result):
+            probability = float(score_map_results(round_model, [map_result])[0][-1])
+            # The model predicts the rounds of the team at the top in the first half, which switch sides after it.
+            if get_first_half_teams(map_result)[1] == first_team:
+                probability = 1 - probability
+            return probability
+    # Without a live map, the first round of the next map is predicted.
+    features, _, _ = build_features(
+        RoundHistories.from_round_lists([list()]), include_next_round=True
+    )
+    return float(round_model.predict(features)[0])
+
+
+def simulate_match(url: str, simulations: int, workers: int = 1) -> dict:
+    """Estimates the map and series win probabilities of the first team of a (live) match by Monte Carlo simulation.
+
+    The result is cached per match and round, so all viewers of the same round share one simulation.
+    """
+    from predict import simulate
+
+    record = assemble_match(parse_match(url))
+    state = simulate.get_series_state(record)
+    live_map = state["live_map"]
+    key = (
+        record.get("match_id") or get_match_key(url),
+        sum(state["maps_won"]),
+        sum(live_map["score"]) if live_map else 0,
+    )
+    if simulation_cache is not None:
+        result = simulation_cache.get(key)
+        if result is not None:
+            return result
+
+    def run() -> dict:
+        round_probability = get_round_probability(
+            record, state["teams"][0] if state["teams"] else None
+        )
+        simulated = 0 if state["decided"] else simulations
+        # A decided series returns its result right away, so no simulation workers are started for it.
+        with metrics.timed("simulate"):
+            map_probability, series_probability = simulate.simulate_series_parallel(
+                record.get("best_of") or 1,
+                state["maps_won"],
+                live_map["score"] if live_map else None,
+                round_probability,
+                simulated,
+                workers if simulated else 1,
+            )
+        result = {
+            **state,
+            "best_of": record.get("best_of") or 1,
+            "round_win_probability": round(round_probability, 4),
+            "map_win_probability": round(map_probability, 4),
+            "series_win_probability": round(series_probability, 4),
+            "simulations": simulated,
+        }
+        if simulation_cache is not None:
+            simulation_cache.set(key, result)
+        return result
+
+    return series_simulations.do(key, run)
+
+
+def stream_match(url: str, refresh: bool = False):
+    """Yields the fragments of a match as soon as the spider scraped them, e.g. the event before the map results.
+
+    A cached match is yielded from the cache at once. Streamed crawls are not coalesced with other crawls, since
+    every stream needs the fragments of its own crawl as they come.
+    """
+    match_key = get_match_key(url)
+    if result_cache is not None and isinstance(match_key, int) and not refresh:
+        with metrics.timed("cache_lookup"):
+            items = result_cache.get(match_key)
+        if items is not None:
+            yield from items
+            return
+
+    items = list()
+    with metrics.timed("crawl"):
+        for item in engine.get_engine().iter_crawl(MATCH_SPIDER_NAME, start_urls=url):
+            items.append(item)
+            yield item
+    if not items:
+        raise engine.CrawlError(f"No items could be scraped from {url}.")
+    store_crawled_match(match_key, items)
@@ -0,0 +1,267 @@
+import atexit
+import importlib
+import queue
+import re
+import threading
+import time
+from concurrent.futures import Future
+
+from . import metrics
+
+PROJECT_PACKAGE = "scrape.scrape"
+PROJECT_SETTINGS_MODULE = f"{PROJECT_PACKAGE}.settings"
+# Dotted paths in the Scrapy project settings are relative to "backend/scrape", which is the working directory of
+# "scrapy crawl". Inside the API process they have to be rebased onto the "scrape.scrape" package.
+PROJECT_RELATIVE_PREFIX = "scrape."
+
+
+# Kinds of the downloaded pages by their URL regex, e.g. to tell the robots.txt fetches from the page downloads.
+PAGE_KINDS = (
+    ("robots", re.compile(r"/robots\.txt$")),
+    ("stats", re.compile(r"/stats/matches/")),
+    ("match", re.compile(r"/matches/\d+")),
+    ("listing", re.compile(r"/(results|matches)/?(\?|$)")),
+)
+
+
+# Marks the end of the items of ``CrawlEngine.iter_crawl``.
+CRAWL_FINISHED = object()
+
+
+class CrawlError(Exception):
+    pass
+
+
+def get_page_kind(url: str) -> str:
+    for kind, pattern in PAGE_KINDS:
+        if pattern.search(url):
+            return kind
+    return "other"
+
+
+def rebase_project_path(value):
+    if isinstance(value, str):
+        if value.startswith(PROJECT_RELATIVE_PREFIX) and not value.startswith(
+            PROJECT_PACKAGE + "."
+        ):
+            return "scrape." + value
+        return value
+    if isinstance(value, (list, tuple)):
+        return type(value)(rebase_project_path(elem) for elem in value)
+    if isinstance(value, dict):
+        return {rebase_project_path(key): elem for key, elem in value.items()}
+    return value
+
+
+def load_project_settings(overrides: dict | None = None):
+    from scrapy.settings import Settings
+
+    settings = Settings()
+    module = importlib.import_module(PROJECT_SETTINGS_MODULE)
+    for key in dir(module):
+        if key.isupper():
+            settings.set(
+                key, rebase_project_path(getattr(module, key)), priority="project"
+            )
+    if overrides:
+        settings.setdict(overrides, priority="cmdline")
+    return settings
+
+
+def get_data_path(setting: str) -> str:
+    """Returns the path of a data file of the Scrapy project by its setting, e.g. ``MATCH_STORE_PATH``."""
+    from scrapy.utils.project import data_path
+
+    return data_path(load_project_settings()[setting])
+
+
+def preload() -> None:
+    """Imports the Scrapy stack and the spiders of the project without starting the reactor.
+
+    E.g. a prefork server calls it before forking its workers, so all of them start with the imports already done.
+    """
+    import scrapy.crawler  # noqa: F401
+    import twisted.internet.asyncioreactor  # noqa: F401
+
+    for module in load_project_settings().getlist("SPIDER_MODULES"):
+        importlib.import_module(module)
+    for component in ("middlewares", "pipelines", "httpcache", "spiders.discovery"):
+        importlib.import_module(f"{PROJECT_PACKAGE}.{component}")
+
+
+class CrawlEngine:
+    """Long-lived Scrapy engine, which runs the spiders on a reactor thread inside of the current process.
+
+    Every call of ``crawl`` reuses the already imported Scrapy/Twisted stack and the running reactor, so only the
+    actual downloads and parsing remain as per-request costs. A Twisted reactor cannot be restarted, so an engine cannot
+    be started again after it was stopped, and there is only one engine per process (see ``get_engine``).
+    """
+
+    def __init__(self, settings_overrides: dict | None = None) -> None:
+        self.settings_overrides = settings_overrides
+        self._runner = None
+        self._reactor = None
+        self._started = False
+        self._lock = threading.Lock()
+
+    @property
+    def running(self) -> bool:
+        return self._runner is not None
+
+    @property
+    def started(self) -> bool:
+        return self._started
+
+    def start(self) -> None:
+        with self._lock:
+            if self.running:
+                return
+            if self._started:
+                raise CrawlError(
+                    "The crawl engine was stopped and cannot be restarted, since its reactor cannot."
+                )
+
+            settings = load_project_settings(self.settings_overrides)
+            started = Future()
+
+            def run_reactor():
+                # The reactor is installed from within its own thread, so the asyncio event loop belongs to it.
+                try:
+                    from scrapy.crawler import CrawlerRunner
+                    from scrapy.utils.reactor import install_reactor
+
+                    install_reactor(settings.get("TWISTED_REACTOR"))
+                    from twisted.internet import reactor
+
+                    runner = CrawlerRunner(settings)
+                except Exception as error:
+                    started.set_exception(error)
+                    return
+                reactor.callWhenRunning(started.set_result, (reactor, runner))
+                reactor.run(installSignalHandlers=False)
+
+            threading.Thread(
+                target=run_reactor, name="hmp-crawl-engine", daemon=True
+            ).start()
+            self._reactor, self._runner = started.result()
+            self._started = True
+
+    def stop(self) -> None:
+        with self._lock:
+            if not self.running:
+                return
+            self._reactor.callFromThread(self._reactor.stop)
+            self._runner = None
+            self._reactor = None
+
+    def crawl(self, spider, timeout: float | None = None, **spider_kwargs) -> list:
+        """Runs the given spider (class or name) and returns the scraped items, once the crawl has finished."""
+        items = list()
+        self._schedule_crawl(spider, items.append, spider_kwargs).result(timeout)
+        return items
+
+    def iter_crawl(self, spider, timeout: float | None = None, **spider_kwargs):
+        """Runs the given spider and yields every item as soon as it was scraped.
+
+        ``timeout`` limits the wait for the next item. Errors of the crawl are raised after the scraped items.
+        """
+        items = queue.Queue()
+        finished = self._schedule_crawl(spider, items.put, spider_kwargs)
+        finished.add_done_callback(lambda _: items.put(CRAWL_FINISHED))
+        while True:
+            try:
+                item = items.get(timeout=timeout)
+            except queue.Empty:
+                raise CrawlError("Timed out waiting for the next item.") from None
+            if item is CRAWL_FINISHED:
+                break
+            yield item
+        finished.result()
+
+    def _schedule_crawl(self, spider, on_item, spider_kwargs: dict) -> Future:
+        """Schedules the crawl on the reactor thread and returns a future, which is done once the crawl finished."""
+        self.start()
+        from scrapy import signals
+
+        from scrape.scrape.middlewares import parse_timed
+
+        result = Future()
+        scheduled_at = time.perf_counter()
+
+        def collect_item(item, response, spider):
+            on_item(item)
+
+        def observe_spider_opened(spider):
+            metrics.observe_stage("crawler_start", time.perf_counter() - scheduled_at)
+
+        def observe_response(response, request, spider):
+            # Only actual downloads have a latency, responses from the HTTP cache do not.
+            if "download_latency" in request.meta:
+                metrics.download_seconds.observe(
+                    request.meta["download_latency"], kind=get_page_kind(request.url)
+                )
+
+        def observe_parse(callback, seconds):
+            metrics.observe_stage(f"parse:{callback}", seconds)
+
+        def collect_stats(spider, reason):
+            metrics.crawls.inc(outcome=reason)
+            metrics.add_scrapy_stats(spider.crawler.stats.get_stats())
+
+        def schedule_crawl():
+            try:
+                crawler = self._runner.create_crawler(spider)
+                for handler, signal in (
+                    (collect_item, signals.item_scraped),
+                    (observe_spider_opened, signals.spider_opened),
+                    (observe_response, signals.response_received),
+                    (observe_parse, parse_timed),
+                    (collect_stats, signals.spider_closed),
+                ):
+                    crawler.signals.connect(handler, signal=signal, weak=False)
+                deferred = self._runner.crawl(crawler, **spider_kwargs)
+            except Exception as error:
+                result.set_exception(CrawlError(error))
+                return
+            deferred.addCallbacks(
+                lambda _: result.set_result(None),
+                lambda failure: result.set_exception(CrawlError(failure.value)),
+            )
+
+        self._reactor.callFromThread(schedule_crawl)
+        return result
+
+
+_engine: CrawlEngine | None = None
+_engine_lock = threading.Lock()
+
+
+def init_engine(settings_overrides: dict | None = None) -> None:
+    """Configures the engine of the process with the given settings overrides, before it is started.
+
+    The settings of a started engine cannot change anymore, since its reactor cannot be restarted.
+    """
+    global _engine
+    with _engine_lock:
+        if _engine is not None and _engine.started:
+            if _engine.settings_overrides != settings_overrides:
+                raise CrawlError(
+                    "The crawl engine already runs with other settings overrides, which cannot change in this process."
+                )
+            return
+        _engine = CrawlEngine(settings_overrides)
+
+
+def get_engine() -> CrawlEngine:
+    global _engine
+    with _engine_lock:
+        if _engine is None:
+            _engine = CrawlEngine()
+        return _engine
+
+
+@atexit.register
+def stop_engine() -> None:
+    with _engine_lock:
+        if _engine is not None:
+            _engine.stop()
@@ -0,0 +1,163 @@
+import json
+import os
+import time
+from concurrent.futures import FIRST_COMPLETED, ThreadPoolExecutor, wait
+from pathlib import Path
+
+from . import common
+
+# Size of the blocks, in which the output is read backwards to find its last record.
+TAIL_BLOCK_SIZE = 64 * 1024
+
+
+class Checkpoint:
+    """Append-only log of the already handled match keys, so an interrupted ingestion resumes where it stopped.
+
+    Only the matches, whose last status is "done", are skipped on resume, so the failed ones are crawled again.
+    """
+
+    def __init__(self, path) -> None:
+        self.path = Path(path)
+        self.statuses: dict[str, str] = dict()
+        if self.path.exists():
+            with open(self.path, encoding="utf-8") as checkpoint:
+                for line in checkpoint:
+                    if line.strip():
+                        key, _, status = line.rstrip("\n").partition("\t")
+                        self.statuses[key] = status
+        self._file = open(self.path, "a", encoding="utf-8")
+
+    def __contains__(self, key) -> bool:
+        return self.statuses.get(str(key)) == "done"
+
+    def mark(self, key, status: str) -> None:
+        self.statuses[str(key)] = status
+        self._file.write(f"{key}\t{status}\n")
+        self._file.flush()
+
+    def close(self) -> None:
+        self._file.close()
+
+
+class Progress:
+    def __init__(self, total: int) -> None:
+        self.total = total
+        self.finished = 0
+        self.failed = 0
+        self._start = time.monotonic()
+
+    @property
+    def matches_per_minute(self) -> float:
+        elapsed = time.monotonic() - self._start
+        return 60 * self.finished / elapsed if elapsed > 0 else 0.0
+
+    @property
+    def eta_seconds(self) -> float | None:
+        rate = self.matches_per_minute
+        return 60 * (self.total - self.finished) / rate if rate > 0 else None
+
+    def __str__(self) -> str:
+        eta = self.eta_seconds
+        eta = "?" if eta is None else time.strftime("%H:%M:%S", time.gmtime(eta))
+        return (
+            f"{self.finished}/{self.total} matches ({self.failed} failed), "
+            f"{self.matches_per_minute:.1f} matches/min, ETA {eta}"
+        )
+
+
+def read_match_urls(path) -> list[str]:
+    with open(path, encoding="utf-8") as urls:
+        return [url.strip() for url in urls if url.strip()]
+
+
+def get_match_urls_of_range(first_id: int, last_id: int) -> list[str]:
+    return [
+        common.MATCH_URL_TEMPLATE.format(match_id=match_id)
+        for match_id in range(first_id, last_id + 1)
+    ]
+
+
+def recover_output(output_path, checkpoint: Checkpoint) -> None:
+    """Repairs the end of the output of an interrupted ingestion, before it is resumed.
+
+    Every record is written before its match is marked in the checkpoint, so only the last record can be missing in the
+    checkpoint, which is marked as done instead of crawling and writing the match again. A partially written last line
+    is cut off, before the line before it is checked.
+    """
+    if not Path(output_path).exists():
+        return
+    with open(output_path, "rb+") as output:
+        start = output.seek(0, os.SEEK_END)
+        tail = b""
+        while start > 0:
+            block_start = max(0, start - TAIL_BLOCK_SIZE)
+            output.seek(block_start)
+            tail = output.read(start - block_start) + tail
+            start = block_start
+            # The newline, which ends the line before the last one, is the start of the last line.
+            newline = tail.rfind(b"\n", 0, len(tail) - 1)
+            if newline >= 0:
+                start += newline + 1
+                tail = tail[newline + 1 :]
+                break
+        if not tail:
+            return
+        truncated = not tail.endswith(b"\n")
+        if truncated:
+            output.truncate(start)
+    if truncated:
+        recover_output(output_path, checkpoint)
+        return
+    match_id = json.loads(tail).get("match_id")
+    if match_id is not None and match_id not in checkpoint:
+        checkpoint.mark(match_id, "done")
+
+
+def ingest_matches(
+    urls: list[str],
+    output_path,
+    checkpoint: Checkpoint,
+    concurrency: int,
+    refresh: bool = False,
+    report=print,
+) -> Progress:
+    """Crawls all matches with ``concurrency`` crawls at once and appends one record per finished match as JSONL."""
+    recover_output(output_path, checkpoint)
+    pending_urls = [url for url in urls if common.get_match_key(url) not in checkpoint]
+    progress = Progress(len(pending_urls))
+    with ThreadPoolExecutor(concurrency) as executor, open(
+        output_path, "a", encoding="utf-8"
+    ) as output:
+        url_iterator = iter(pending_urls)
+        futures = dict()
+
+        def submit_next() -> None:
+            url = next(url_iterator, None)
+            if url is not None:
+                futures[
+                    executor.submit(common.parse_match, url, refresh, "backfill")
+                ] = url
+
+        # Only keep a small window of crawls submitted, instead of one future per match of the whole backfill.
+        for _ in range(2 * concurrency):
+            submit_next()
+        while futures:
+            done, _ = wait(futures, return_when=FIRST_COMPLETED)
+            for future in done:
+                url = futures.pop(future)
+                try:
+                    record = common.assemble_match(future.result())
+                # A single broken match, e.g. a page the spider cannot parse, must not end the whole ingestion.
+                except Exception as error:
+                    progress.failed += 1
+                    checkpoint.mark(common.get_match_key(url), "failed")
+                    report(f"Could not parse {url}: {error}")
+                else:
+                    output.write(json.dumps(record, ensure_ascii=False) + "\n")
+                    output.flush()
+                    checkpoint.mark(common.get_match_key(url), "done")
+                progress.finished += 1
+                report(str(progress))
+                submit_next()
+
+    return progress
@@ -0,0 +1,108 @@
+import threading
+import time
+import uuid
+from collections import OrderedDict
+from concurrent.futures import ThreadPoolExecutor
+from enum import Enum
+
+
+class JobQueueFull(Exception):
+    pass
+
+
+class Job:
+    class Status(Enum):
+        QUEUED = 0
+        RUNNING = 1
+        FINISHED = 2
+        FAILED = 3
+
+    def __init__(self, url: str, **kwargs) -> None:
+        self.id = uuid.uuid4().hex
+        self.url = url
+        self.kwargs = kwargs
+        self.status = self.Status.QUEUED
+        self.result: list[dict] | None = None
+        self.error: str | None = None
+        self.finished_at: float | None = None
+        self._done = threading.Event()
+
+    @property
+    def done(self) -> bool:
+        return self._done.is_set()
+
+    def wait(self, timeout: float | None = None) -> bool:
+        return self._done.wait(timeout)
+
+    def to_dict(self):
+        member_dict = {"id": self.id, "url": self.url, "status": self.status.name}
+        if self.status == self.Status.FINISHED:
+            member_dict.update({"result": self.result})
+        elif self.status == self.Status.FAILED:
+            member_dict.update({"error": self.error})
+        return member_dict
+
+
+class JobQueue:
+    """Bounded worker pool for crawl jobs, where every job keeps its own result.
+
+    At most ``max_workers`` jobs run at the same time and at most ``max_queued`` further jobs wait for a worker.
+    Submitting beyond that raises ``JobQueueFull`` instead of growing the backlog. Finished jobs are kept for
+    ``result_ttl`` seconds to be polled.
+    """
+
+    def __init__(
+        self, func, max_workers: int, max_queued: int, result_ttl: float
+    ) -> None:
+        self.func = func
+        self.max_pending = max_workers + max_queued
+        self.result_ttl = result_ttl
+        self._executor = ThreadPoolExecutor(max_workers, thread_name_prefix="hmp-job")
+        self._jobs: OrderedDict[str, Job] = OrderedDict()
+        self._pending = 0
+        self._lock = threading.Lock()
+
+    @property
+    def pending(self) -> int:
+        return self._pending
+
+    def submit(self, url: str, **kwargs) -> Job:
+        job = Job(url, **kwargs)
+        with self._lock:
+            self._expire_jobs()
+            if self._pending >= self.max_pending:
+                raise JobQueueFull(f"{self._pending} crawl jobs are already pending.")
+            self._pending += 1
+            self._jobs[job.id] = job
+        self._executor.submit(self._run, job)
+        return job
+
+    def get(self, job_id: str) -> Job | None:
+        with self._lock:
+            return self._jobs.get(job_id)
+
+    def _run(self, job: Job) -> None:
+        job.status = Job.Status.RUNNING
+        try:
+            job.result = self.func(job.url, **job.kwargs)
+            job.status = Job.Status.FINISHED
+        except Exception as error:
+            job.error = str(error) or type(error).__name__
+            job.status = Job.Status.FAILED
+        finally:
+            job.finished_at = time.monotonic()
+            with self._lock:
+                self._pending -= 1
+                # Move the job to the end, so the jobs are ordered by their finishing time for the expiration.
+                self._jobs.move_to_end(job.id)
+            job._done.set()
+
+    def _expire_jobs(self) -> None:
+        deadline = time.monotonic() - self.result_ttl
+        for job_id in list(self._jobs):
+            job = self._jobs[job_id]
+            if not job.done:
+                continue
+            if job.finished_at > deadline:
+                break
+            del self._jobs[job_id]
@@ -0,0 +1,213 @@
+import json
+import logging
+import queue
+import threading
+
+from predict.series import is_finished
+
+from . import common, engine
+
+HALVES = ("firsthalf", "secondhalf")
+TEAM_RESULTS = ("toppart_team_result", "bottompart_team_result")
+# Events, after which the stream of a live match ends.
+FINAL_EVENTS = ("finished", "closed")
+
+logger = logging.getLogger(__name__)
+
+
+def get_live_map_result(items: list[dict]) -> dict | None:
+    for item in items:
+        if "map_result" in item and item["map_result"]["source"] == "SCOREBOARD":
+            return item["map_result"]
+    return None
+
+
+def get_round_delta(previous: dict, current: dict) -> dict | None:
+    """Returns only the new rounds and changed scores of the live map or ``None``, if nothing changed.
+
+    Raises ``ValueError``, if the current state does not continue the previous one (e.g. another map started), so
+    the subscribers need a new snapshot instead.
+    """
+    if previous["mapname"] != current["mapname"]:
+        raise ValueError("The live map changed.")
+
+    delta = dict()
+    for team_result in TEAM_RESULTS:
+        team_delta = dict()
+        for half in HALVES:
+            previous_rounds = previous[team_result][half] or list()
+            current_rounds = current[team_result][half] or list()
+            if current_rounds[: len(previous_rounds)] != previous_rounds:
+                raise ValueError("The round history was rewritten.")
+            if len(current_rounds) > len(previous_rounds):
+                team_delta[half] = current_rounds[len(previous_rounds) :]
+        if previous[team_result]["score"] != current[team_result]["score"]:
+            team_delta["score"] = current[team_result]["score"]
+        if team_delta:
+            delta[team_result] = team_delta
+
+    if not delta:
+        return None
+    delta["mapname"] = current["mapname"]
+    return delta
+
+
+class LiveMatch:
+    """One upstream poller of a live match, which pushes the round deltas to all of its subscribers.
+
+    A failed crawl is pushed as an ``error`` event and polled again. Any other error (e.g. a page the spider cannot
+    parse) would fail every poll the same way, so the subscribers receive the ``error`` and are ``closed`` instead.
+    """
+
+    def __init__(self, url: str, interval: float, queue_size: int = 100) -> None:
+        self.url = url
+        self.interval = interval
+        self.queue_size = queue_size
+        self.state: dict | None = None
+        self.finished = False
+        self.closed = False
+        self._subscribers: set[queue.Queue] = set()
+        self._lock = threading.Lock()
+        self._stopped = threading.Event()
+        self._thread = threading.Thread(
+            target=self._poll, name=f"hmp-live-{url}", daemon=True
+        )
+
+    @property
+    def subscriber_count(self) -> int:
+        return len(self._subscribers)
+
+    @property
+    def stopped(self) -> bool:
+        return self._stopped.is_set()
+
+    def start(self) -> None:
+        self._thread.start()
+
+    def stop(self) -> None:
+        self._stopped.set()
+
+    def subscribe(self) -> queue.Queue:
+        subscriber = queue.Queue(self.queue_size)
+        with self._lock:
+            # Late subscribers start with the last known state, before they receive the next deltas.
+            if self.state is not None:
+                subscriber.put(("snapshot", self.state))
+            if self.finished:
+                subscriber.put(("finished", None))
+            elif self.closed:
+                subscriber.put(("closed", None))
+            self._subscribers.add(subscriber)
+        return subscriber
+
+    def unsubscribe(self, subscriber: queue.Queue) -> int:
+        with self._lock:
+            self._subscribers.discard(subscriber)
+            return len(self._subscribers)
+
+    def _publish(self, event: str, data, state: dict | None = None) -> None:
+        with self._lock:
+            # The state is updated together with publishing, so new subscribers never miss or repeat a delta.
+            if state is not None:
+                self.state = state
+            for subscriber in self._subscribers:
+                try:
+                    subscriber.put_nowait((event, data))
+                except queue.Full:
+                    # A subscriber, which could not keep up, is resynchronized with the whole state.
+                    with subscriber.mutex:
+                        subscriber.queue.clear()
+                    subscriber.put_nowait(("snapshot", self.state))
+
+    def _update(self, map_result: dict | None, finished: bool = False) -> None:
+        if map_result is None or finished:
+            self.finished = True
+            self._publish("finished", None)
+            self.stop()
+            return
+        if self.state is None:
+            self._publish("snapshot", map_result, map_result)
+            return
+        try:
+            delta = get_round_delta(self.state, map_result)
+        except ValueError:
+            self._publish("snapshot", map_result, map_result)
+            return
+        if delta is not None:
+            self._publish("rounds", delta, map_result)
+
+    def _close(self, error: Exception) -> None:
+        self.closed = True
+        self._publish("error", str(error) or type(error).__name__)
+        self._publish("closed", None)
+        self.stop()
+
+    def _poll(self) -> None:
+        while not self._stopped.is_set():
+            try:
+                items = common.parse_match(self.url, refresh=True)
+                # A series decided early keeps the placeholders of its unplayed maps, which are never live.
+                map_result = get_live_map_result(items)
+                finished = is_finished(common.assemble_match(items))
+            except engine.CrawlError as error:
+                self._publish("error", str(error))
+            except Exception as error:
+                logger.exception(f"Polling the live match {self.url} failed.")
+                self._close(error)
+                return
+            else:
+                self._update(map_result, finished)
+            self._stopped.wait(self.interval)
+
+
+class LiveTracker:
+    """Registry of the live matches, so all subscribers of a match share one upstream poller.
+
+    The registry is per process, so every prefork worker with subscribers of a match runs its own poller of it. Their
+    downloads still share the HTTP cache, where a match page is fresh for some seconds, and the token bucket.
+    """
+
+    def __init__(self, interval: float) -> None:
+        self.interval = interval
+        self._matches: dict[int | str, LiveMatch] = dict()
+        self._lock = threading.Lock()
+
+    @property
+    def match_count(self) -> int:
+        return len(self._matches)
+
+    def subscribe(self, url: str) -> tuple[LiveMatch, queue.Queue]:
+        match_key = common.get_match_key(url)
+        with self._lock:
+            live_match = self._matches.get(match_key)
+            if live_match is None or live_match.stopped:
+                # The first subscriber is added before the poller starts, so it receives the events of the first poll.
+                live_match = self._matches[match_key] = LiveMatch(url, self.interval)
+                subscriber = live_match.subscribe()
+                live_match.start()
+                return live_match, subscriber
+            return live_match, live_match.subscribe()
+
+    def unsubscribe(self, live_match: LiveMatch, subscriber: queue.Queue) -> None:
+        with self._lock:
+            if live_match.unsubscribe(subscriber) == 0:
+                live_match.stop()
+                match_key = common.get_match_key(live_match.url)
+                if self._matches.get(match_key) is live_match:
+                    del self._matches[match_key]
+
+    def stream(self, url: str, keepalive: float):
+        """Yields the Server-Sent Events of the live match, until the match finished or the client disconnected."""
+        live_match, subscriber = self.subscribe(url)
+        try:
+            while True:
+                try:
+                    event, data = subscriber.get(timeout=keepalive)
+                except queue.Empty:
+                    yield ": keepalive\n\n"
+                    continue
+                yield f"event: {event}\ndata: {json.dumps(data)}\n\n"
+                if event in FINAL_EVENTS:
+                    return
+        finally:
+            self.unsubscribe(live_match, subscriber)
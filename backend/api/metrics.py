@@ -0,0 +1,211 @@
+import threading
+import time
+from contextlib import contextmanager
+
+from flask import g, has_request_context
+
+DEFAULT_BUCKETS = (
+    0.001,
+    0.005,
+    0.01,
+    0.025,
+    0.05,
+    0.1,
+    0.25,
+    0.5,
+    1.0,
+    2.5,
+    5.0,
+    10.0,
+    30.0,
+)
+
+
+# Numeric Scrapy stats, which are counts (and not e.g. gauges like the cache hit rate), by their prefix.
+SCRAPY_COUNTER_STATS = (
+    "downloader/",
+    "retry/",
+    "httpcache/hit",
+    "httpcache/miss",
+    "httpcache/revalidate",
+    "robotstxt/",
+    "archive/",
+    "tokenbucket/",
+    "item_scraped_count",
+    "response_received_count",
+)
+
+
+def escape_label_value(value) -> str:
+    return str(value).replace("\\", "\\\\").replace('"', '\\"').replace("\n", "\\n")
+
+
+def format_labels(label_names: tuple[str, ...], label_values: tuple, **extra) -> str:
+    labels = dict(zip(label_names, label_values), **extra)
+    if not labels:
+        return ""
+    return (
+        "{"
+        + ",".join(
+            f'{name}="{escape_label_value(value)}"' for name, value in labels.items()
+        )
+        + "}"
+    )
+
+
+class Counter:
+    def __init__(
+        self, name: str, documentation: str, label_names: tuple[str, ...] = ()
+    ) -> None:
+        self.name = name
+        self.documentation = documentation
+        self.label_names = label_names
+        self._values: dict[tuple, float] = dict()
+        self._lock = threading.Lock()
+
+    def inc(self, amount: float = 1, **labels) -> None:
+        key = tuple(labels[name] for name in self.label_names)
+        with self._lock:
+            self._values[key] = self._values.get(key, 0) + amount
+
+    def render(self) -> list[str]:
+        lines = [
+            f"# HELP {self.name} {self.documentation}",
+            f"# TYPE {self.name} counter",
+        ]
+        with self._lock:
+            for key, value in sorted(self._values.items()):
+                lines.append(
+                    f"{self.name}{format_labels(self.label_names, key)} {value:g}"
+                )
+        return lines
+
+
+class Histogram:
+    def __init__(
+        self,
+        name: str,
+        documentation: str,
+        label_names: tuple[str, ...] = (),
+        buckets: tuple[float, ...] = DEFAULT_BUCKETS,
+    ) -> None:
+        self.name = name
+        self.documentation = documentation
+        self.label_names = label_names
+        self.buckets = buckets
+        # Per label values: The (non-cumulative) count of every bucket plus +Inf, the sum and the count.
+        self._values: dict[tuple, list] = dict()
+        self._lock = threading.Lock()
+
+    def observe(self, value: float, **labels) -> None:
+        key = tuple(labels[name] for name in self.label_names)
+        index = next(
+            (index for index, bound in enumerate(self.buckets) if value <= bound),
+            len(self.buckets),
+        )
+        with self._lock:
+            values = self._values.setdefault(
+                key, [[0] * (len(self.buckets) + 1), 0.0, 0]
+            )
+            values[0][index] += 1
+            values[1] += value
+            values[2] += 1
+
+    def render(self) -> list[str]:
+        lines = [
+            f"# HELP {self.name} {self.documentation}",
+            f"# TYPE {self.name} histogram",
+        ]
+        with self._lock:
+            for key, (counts, total, count) in sorted(self._values.items()):
+                cumulative = 0
+                for bound, bucket_count in zip(self.buckets + ("+Inf",), counts):
+                    cumulative += bucket_count
+                    labels = format_labels(self.label_names, key, le=bound)
+                    lines.append(f"{self.name}_bucket{labels} {cumulative}")
+                labels = format_labels(self.label_names, key)
+                lines.append(f"{self.name}_sum{labels} {total:g}")
+                lines.append(f"{self.name}_count{labels} {count}")
+        return lines
+
+
+class Registry:
+    def __init__(self) -> None:
+        self.metrics: list[Counter | Histogram] = list()
+
+    def counter(self, *args, **kwargs) -> Counter:
+        metric = Counter(*args, **kwargs)
+        self.metrics.append(metric)
+        return metric
+
+    def histogram(self, *args, **kwargs) -> Histogram:
+        metric = Histogram(*args, **kwargs)
+        self.metrics.append(metric)
+        return metric
+
+    def render(self) -> str:
+        """Renders all metrics in the Prometheus text exposition format."""
+        return (
+            "\n".join(line for metric in self.metrics for line in metric.render())
+            + "\n"
+        )
+
+
+registry = Registry()
+
+stage_seconds = registry.histogram(
+    "hmp_stage_seconds",
+    "Latency of the stages of handling a match (cache lookup, crawl, parse, serialize, ...).",
+    ("stage",),
+)
+download_seconds = registry.histogram(
+    "hmp_download_seconds",
+    "Latency of the page downloads by page kind, without the time waited for the download slot.",
+    ("kind",),
+)
+http_request_seconds = registry.histogram(
+    "hmp_http_request_seconds", "Latency of the API requests.", ("endpoint",)
+)
+http_requests = registry.counter(
+    "hmp_http_requests_total",
+    "API requests by endpoint and status.",
+    ("endpoint", "status"),
+)
+crawls = registry.counter(
+    "hmp_crawls_total", "Finished crawls by outcome.", ("outcome",)
+)
+scrapy_stats = registry.counter(
+    "hmp_scrapy_stats_total",
+    "Summed numeric Scrapy crawl stats (requests, response codes, retries, bytes, cache hits, ...).",
+    ("stat",),
+)
+
+
+def observe_stage(stage: str, seconds: float) -> None:
+    stage_seconds.observe(seconds, stage=stage)
+    # The stages of the current API request are also collected for its timing header.
+    if has_request_context():
+        g.setdefault("hmp_stage_timings", list()).append((stage, seconds))
+
+
+@contextmanager
+def timed(stage: str):
+    start = time.perf_counter()
+    try:
+        yield
+    finally:
+        observe_stage(stage, time.perf_counter() - start)
+
+
+def add_scrapy_stats(stats: dict) -> None:
+    for key, value in stats.items():
+        if key.startswith(SCRAPY_COUNTER_STATS) and isinstance(value, (int, float)):
+            scrapy_stats.inc(value, stat=key)
+
+
+def get_server_timing() -> str:
+    """Returns the stage timings of the current API request as ``Server-Timing`` header value."""
+    return ", ".join(
+        f"{stage};dur={seconds * 1000:.1f}"
+        for stage, seconds in g.get("hmp_stage_timings", list())
+    )
@@ -0,0 +1,39 @@
+import threading
+from concurrent.futures import Future
+
+
+class SingleFlight:
+    """Coalesces concurrent calls with the same key into one call, whose result is shared by all callers."""
+
+    def __init__(self) -> None:
+        self.coalesced = 0
+        self._calls: dict[object, Future] = dict()
+        self._lock = threading.Lock()
+
+    @property
+    def in_flight(self) -> int:
+        return len(self._calls)
+
+    def do(self, key, func, *args, **kwargs):
+        with self._lock:
+            call = self._calls.get(key)
+            if call is not None:
+                self.coalesced += 1
+                is_leader = False
+            else:
+                call = self._calls[key] = Future()
+                is_leader = True
+        if not is_leader:
+            return call.result()
+
+        try:
+            result = func(*args, **kwargs)
+        except BaseException as error:
+            call.set_exception(error)
+            raise
+        else:
+            call.set_result(result)
+            return result
+        finally:
+            with self._lock:
+                del self._calls[key]
@@ -0,0 +1,79 @@
+"""Compares the latency of a cold "scrapy crawl" subprocess with the warm in-process crawl engine.
+
+Both download every page, i.e. neither answers a run from the HTTP cache filled by the previous runs nor waits for the
+token bucket. Run from the "backend" directory:
+
+    python -m benchmarks.crawl_engine https://www.hltv.org/matches/<id>/<slug> --runs 5
+"""
+
+import argparse
+import statistics
+import subprocess
+import tempfile
+import time
+from pathlib import Path
+
+from api import common, engine
+from scrape.scrape.spiders import match
+
+# Settings overrides of both crawls, so every run measures the actual downloads.
+CRAWL_SETTINGS = {"HTTPCACHE_ENABLED": False, "TOKEN_BUCKET_ENABLED": False}
+
+
+def crawl_cold(url: str) -> float:
+    with tempfile.TemporaryDirectory() as directory:
+        start = time.perf_counter()
+        subprocess.run(
+            [
+                "scrapy",
+                "crawl",
+                match.MatchSpider.name,
+                "-a",
+                f"start_urls={url}",
+                "-O",
+                str(Path(directory) / "parsed_match.json"),
+                *(
+                    argument
+                    for key, value in CRAWL_SETTINGS.items()
+                    for argument in ("-s", f"{key}={value}")
+                ),
+            ],
+            cwd=common.get_module_parent_path("scrape.scrape"),
+            check=True,
+            capture_output=True,
+        )
+        return time.perf_counter() - start
+
+
+def crawl_warm(crawl_engine: engine.CrawlEngine, url: str) -> float:
+    start = time.perf_counter()
+    crawl_engine.crawl(match.MatchSpider, start_urls=url)
+    return time.perf_counter() - start
+
+
+def report(label: str, timings: list[float]) -> None:
+    print(
+        f"{label:>6}: mean {statistics.mean(timings):.3f}s, "
+        f"median {statistics.median(timings):.3f}s, "
+        f"min {min(timings):.3f}s, max {max(timings):.3f}s"
+    )
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("url", help="HLTV match URL to crawl")
+    parser.add_argument("--runs", type=int, default=3)
+    args = parser.parse_args()
+
+    engine.init_engine(CRAWL_SETTINGS)
+    crawl_engine = engine.get_engine()
+    start = time.perf_counter()
+    crawl_engine.start()
+    print(f"engine start-up: {time.perf_counter() - start:.3f}s")
+
+    report("cold", [crawl_cold(args.url) for _ in range(args.runs)])
+    report("warm", [crawl_warm(crawl_engine, args.url) for _ in range(args.runs)])
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,140 @@
+"""Export and load benchmark of the columnar dataset on synthetic series, which also checks what gets exported.
+
+Every finished series has to be exported, including the ones decided before their last map (e.g. 2:0 in a best of
+three), whose unplayed maps are placeholders without any rounds. Unfinished series must be skipped. Run from the
+"backend" directory:
+
+    python -m benchmarks.dataset --matches 20000 --check
+"""
+
+import argparse
+import sys
+import tempfile
+import time
+
+import numpy as np
+
+from predict.dataset import Dataset
+
+from .prediction import generate_round_lists
+
+BEST_OFS = (1, 3, 3, 5)
+
+
+def get_map_result(mapname: str | None, rounds: list[bool]) -> dict:
+    def get_team_result(teamname, won: list[bool]) -> dict:
+        return {
+            "teamname": teamname,
+            "score": sum(won),
+            "firsthalf": won[:12],
+            "secondhalf": won[12:24],
+            "overtime": [won[start : start + 6] for start in range(24, len(won), 6)],
+        }
+
+    if mapname is None:
+        placeholder = {
+            "teamname": None,
+            "score": None,
+            "firsthalf": list(),
+            "secondhalf": list(),
+            "overtime": None,
+        }
+        return {
+            "source": "SCOREBOARD",
+            "mapname": None,
+            "toppart_team_result": placeholder,
+            "bottompart_team_result": dict(placeholder),
+        }
+    return {
+        "source": "STATS_PAGE",
+        "mapname": mapname,
+        "toppart_team_result": get_team_result("Team A", rounds),
+        "bottompart_team_result": get_team_result(
+            "Team B", [not won for won in rounds]
+        ),
+    }
+
+
+def generate_records(match_count: int, seed: int) -> tuple[list[dict], set[int]]:
+    """Returns synthetic series, where every tenth one is still running, and the ids of the finished ones."""
+    rng = np.random.default_rng(seed)
+    round_lists = iter(generate_round_lists(5 * match_count, seed))
+    records = list()
+    finished_ids = set()
+    for match_id in range(match_count):
+        best_of = BEST_OFS[match_id % len(BEST_OFS)]
+        running = match_id % 10 == 9
+        wins = [0, 0]
+        map_results = list()
+        while max(wins) < best_of // 2 + 1:
+            rounds = next(round_lists)
+            if running and sum(wins) == best_of // 2:
+                # The running series stops at the map, which could decide it.
+                break
+            wins[2 * sum(rounds) < len(rounds)] += 1
+            map_results.append(get_map_result(f"map{len(map_results)}", rounds))
+        map_results.extend(
+            get_map_result(None, list()) for _ in range(best_of - len(map_results))
+        )
+        if not running:
+            finished_ids.add(match_id)
+        records.append(
+            {
+                "match_id": match_id,
+                "event": {
+                    "name": "Event",
+                    "datetime": f"2024-{1 + int(rng.integers(12)):02d}-01T18:00:00",
+                },
+                "teams": {"Team A": list(), "Team B": list()},
+                "best_of": best_of,
+                "map_results": map_results,
+            }
+        )
+    records.sort(key=lambda record: record["event"]["datetime"])
+    return records, finished_ids
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--matches", type=int, default=20_000)
+    parser.add_argument("--seed", type=int, default=0)
+    parser.add_argument(
+        "--check", action="store_true", help="Fail if the wrong series got exported."
+    )
+    args = parser.parse_args()
+
+    records, finished_ids = generate_records(args.matches, args.seed)
+    with tempfile.TemporaryDirectory() as directory:
+        dataset = Dataset(directory)
+        start = time.perf_counter()
+        exported = dataset.export(records)
+        export_seconds = time.perf_counter() - start
+
+        start = time.perf_counter()
+        histories = dataset.load_round_histories()
+        load_seconds = time.perf_counter() - start
+        exported_ids = dataset.get_match_ids()
+        round_counts = dataset.load_column("maps", "round_count")
+
+    print(f"Exported {exported} of {len(records)} matches in {export_seconds:.3f}s.")
+    print(
+        f"Loaded {len(histories.lengths)} maps with {histories.total_rounds} rounds "
+        f"in {load_seconds:.3f}s."
+    )
+
+    failures = list()
+    if exported_ids != finished_ids:
+        failures.append(
+            f"{len(finished_ids - exported_ids)} finished series were not exported, "
+            f"{len(exported_ids - finished_ids)} unfinished ones were"
+        )
+    if (round_counts == 0).any():
+        failures.append("unplayed maps were exported")
+    for failure in failures:
+        print(f"FAILED: {failure}")
+    if args.check and failures:
+        sys.exit(1)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,111 @@
+"""Checks the cold start-up of the app against an import-time budget, measured by ``python -X importtime``.
+
+The app is created in fresh interpreters, whose total import time (the median of all runs) must stay within the
+budget, and none of the modules, which are only needed for a crawl (Scrapy, Twisted) or a prediction (NumPy), may be
+imported by then. Run from the "backend" directory:
+
+    python -m benchmarks.import_time --check
+"""
+
+import argparse
+import os
+import re
+import statistics
+import subprocess
+import sys
+import tempfile
+from pathlib import Path
+
+BACKEND_PATH = Path(__file__).parent.parent
+STARTUP_CODE = "import api; api.create_app()"
+# Packages, which must stay deferred until a crawl or a prediction actually runs.
+DEFERRED_PACKAGES = (
+    "scrapy",
+    "twisted",
+    "itemadapter",
+    "scrapy_fake_useragent",
+    "numpy",
+)
+IMPORTTIME_PATTERN = re.compile(r"^import time:\s+(\d+) \|\s+(\d+) \| (\s*)(\S+)$")
+
+
+def measure_startup() -> list[tuple[str, int, int]]:
+    """Returns the module name, self and cumulative import time (us) of every top-level import of a cold start-up."""
+    with tempfile.TemporaryDirectory() as directory:
+        # The app's files are created in a temporary directory, so the measurement leaves the instance folder alone.
+        environment = dict(
+            os.environ,
+            FLASK_RESULT_CACHE_PATH=str(Path(directory) / "result_cache.sqlite3"),
+            FLASK_RATINGS_PATH=str(Path(directory) / "ratings.sqlite3"),
+        )
+        completed = subprocess.run(
+            [sys.executable, "-X", "importtime", "-c", STARTUP_CODE],
+            cwd=BACKEND_PATH,
+            env=environment,
+            check=True,
+            capture_output=True,
+            text=True,
+        )
+    imports = list()
+    for line in completed.stderr.splitlines():
+        match = IMPORTTIME_PATTERN.match(line)
+        if match is not None:
+            self_us, cumulative_us, indent, module = match.groups()
+            imports.append((module, int(self_us), int(cumulative_us), len(indent)))
+    return imports
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--runs", type=int, default=5)
+    parser.add_argument(
+        "--budget-ms",
+        type=float,
+        default=300,
+        help="Max. total import time of the start-up.",
+    )
+    parser.add_argument("--top", type=int, default=10, help="Slowest imports shown.")
+    parser.add_argument(
+        "--check",
+        action="store_true",
+        help="Fail if the budget is exceeded or a deferred module is imported.",
+    )
+    args = parser.parse_args()
+
+    totals = list()
+    for _ in range(args.runs):
+        imports = measure_startup()
+        # The cumulative times of the top-level imports add up to the whole import time.
+        totals.append(
+            sum(cumulative for _, _, cumulative, depth in imports if depth == 0) / 1e3
+        )
+    total_ms = statistics.median(totals)
+
+    print(f"Start-up import time: {total_ms:.1f}ms (budget {args.budget_ms:.0f}ms)")
+    for module, _, cumulative, _ in sorted(imports, key=lambda entry: -entry[2])[
+        : args.top
+    ]:
+        print(f"{cumulative / 1e3:8.1f}ms  {module}")
+
+    failures = list()
+    if total_ms > args.budget_ms:
+        failures.append(
+            f"the import time of {total_ms:.1f}ms exceeds the budget of {args.budget_ms:.0f}ms"
+        )
+    deferred = sorted(
+        {
+            module
+            for module, _, _, _ in imports
+            if module.split(".")[0] in DEFERRED_PACKAGES
+        }
+    )
+    if deferred:
+        failures.append(f"deferred modules are imported: {', '.join(deferred[:5])}")
+    for failure in failures:
+        print(f"FAILED: {failure}")
+    if args.check and failures:
+        sys.exit(1)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,147 @@
+"""Load generator, which sends concurrent match requests at the API and reports throughput, latency and errors.
+
+Run against an API, which crawls the local HLTV stub (see "benchmarks.stub_hltv"), from the "backend" directory. The
+API neither paces its downloads by the token bucket nor answers them from the HTTP cache or archives them, so every
+crawl hits the stub, which applies its own latency and rate limit:
+
+    python -m benchmarks.stub_hltv --port 8800 --latency 0.2 --rate 20
+    FLASK_MATCH_URL_TEMPLATE="http://127.0.0.1:8800/matches/{match_id}/match" \\
+    FLASK_CRAWL_SETTINGS='{"SPIDER_ALLOWED_DOMAINS": ["127.0.0.1"], "TOKEN_BUCKET_ENABLED": false,
+    "HTTPCACHE_ENABLED": false, "PAGE_ARCHIVE_ENABLED": false}' flask run
+    python -m benchmarks.load_test http://127.0.0.1:5000 --match-ids 1000-1199 --requests 2000 --concurrency 16
+
+Repeated match ids are answered from the result cache of the API, unless ``--refresh`` is given.
+"""
+
+import argparse
+import json
+import random
+import time
+import urllib.error
+import urllib.parse
+import urllib.request
+from concurrent.futures import ThreadPoolExecutor
+
+from .parsers import percentile
+
+DEFAULT_MATCH_URL_TEMPLATE = "http://127.0.0.1:8800/matches/{match_id}/match"
+
+
+def build_request(
+    api_url: str, endpoint: str, match_id: int, match_url_template: str, refresh: bool
+) -> urllib.request.Request:
+    query = "?refresh=1" if refresh else ""
+    if endpoint == "parse":
+        data = {"match-url": match_url_template.format(match_id=match_id)}
+        if refresh:
+            data["refresh"] = "1"
+        return urllib.request.Request(
+            f"{api_url}/", data=urllib.parse.urlencode(data).encode()
+        )
+    if endpoint == "stream":
+        return urllib.request.Request(f"{api_url}/matches/{match_id}/stream{query}")
+    return urllib.request.Request(f"{api_url}/simulate/{match_id}")
+
+
+def send(request: urllib.request.Request, timeout: float) -> tuple[float, str]:
+    """Returns the latency until the whole response was read and the status (or error name) of a request."""
+    start = time.perf_counter()
+    try:
+        with urllib.request.urlopen(request, timeout=timeout) as response:
+            lines = response.read().splitlines()
+            status = str(response.status)
+            # A failed stream still answers with 200, but reports the error in its last line.
+            if lines and lines[-1].startswith(b'{"error"'):
+                status = "stream-error"
+    except urllib.error.HTTPError as error:
+        status = str(error.code)
+    except (urllib.error.URLError, TimeoutError, ConnectionError) as error:
+        status = type(error).__name__
+    return time.perf_counter() - start, status
+
+
+def run(args) -> dict:
+    rng = random.Random(args.seed)
+    first_id, last_id = args.match_ids
+    requests = [
+        build_request(
+            args.api_url,
+            args.endpoint,
+            rng.randint(first_id, last_id),
+            args.match_url_template,
+            args.refresh,
+        )
+        for _ in range(args.requests)
+    ]
+    start = time.perf_counter()
+    with ThreadPoolExecutor(args.concurrency) as executor:
+        results = list(
+            executor.map(lambda request: send(request, args.timeout), requests)
+        )
+    duration = time.perf_counter() - start
+
+    latencies = sorted(latency for latency, _ in results)
+    statuses = dict()
+    for _, status in results:
+        statuses[status] = statuses.get(status, 0) + 1
+    errors = sum(count for status, count in statuses.items() if status != "200")
+    return {
+        "requests": len(results),
+        "duration_s": duration,
+        "throughput_rps": len(results) / duration,
+        "p50_ms": percentile(latencies, 0.50) * 1e3,
+        "p95_ms": percentile(latencies, 0.95) * 1e3,
+        "p99_ms": percentile(latencies, 0.99) * 1e3,
+        "error_rate": errors / len(results),
+        "statuses": statuses,
+    }
+
+
+def parse_id_range(value: str) -> tuple[int, int]:
+    first_id, _, last_id = value.partition("-")
+    return int(first_id), int(last_id or first_id)
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument(
+        "api_url", help="Base URL of the API, e.g. http://127.0.0.1:5000"
+    )
+    parser.add_argument(
+        "--endpoint", choices=("parse", "stream", "simulate"), default="parse"
+    )
+    parser.add_argument(
+        "--match-ids",
+        type=parse_id_range,
+        default=(1000, 1199),
+        help="Range FIRST-LAST of the requested match ids, drawn uniformly.",
+    )
+    parser.add_argument("--match-url-template", default=DEFAULT_MATCH_URL_TEMPLATE)
+    parser.add_argument("--requests", type=int, default=1000)
+    parser.add_argument("--concurrency", type=int, default=8)
+    parser.add_argument(
+        "--refresh", action="store_true", help="Bypass the result cache of the API."
+    )
+    parser.add_argument("--timeout", type=float, default=60)
+    parser.add_argument("--seed", type=int, default=0)
+    parser.add_argument("--json", action="store_true", help="Print the report as JSON.")
+    args = parser.parse_args()
+
+    report = run(args)
+    if args.json:
+        print(json.dumps(report, indent=2))
+        return
+    print(
+        f"{report['requests']} requests in {report['duration_s']:.1f}s: "
+        f"{report['throughput_rps']:.1f} req/s, "
+        f"p50 {report['p50_ms']:.1f}ms, p95 {report['p95_ms']:.1f}ms, "
+        f"p99 {report['p99_ms']:.1f}ms, errors {report['error_rate']:.1%}"
+    )
+    print(
+        "Statuses: "
+        + ", ".join(f"{status} {count}" for status, count in report["statuses"].items())
+    )
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,173 @@
+"""Offline benchmark of the single parse stages of the spiders on synthetic fixture pages in the HLTV markup.
+
+Every stage runs on the fixture pages it applies to (see "fixtures/README.md"), which are much smaller than the real
+pages, so the timings compare the stages and their changes rather than predict the parse times on hltv.org. The
+per-page latency percentiles and the peak memory of every stage are reported and, optionally, compared with a stored
+baseline. Run from the "backend" directory:
+
+    python -m benchmarks.parsers --save-baseline
+    python -m benchmarks.parsers --check
+"""
+
+import argparse
+import json
+import sys
+import time
+import tracemalloc
+from pathlib import Path
+
+from scrapy.http import HtmlResponse
+
+from scrape.scrape.spiders import discovery, match
+
+FIXTURES_PATH = Path(__file__).parent / "fixtures"
+DEFAULT_BASELINE_PATH = Path(__file__).parent / ".baselines" / "parsers.json"
+
+# Synthetic fixture pages and the HLTV URLs they stand in for, which are passed to the parsers as the response URLs.
+FIXTURES = {
+    "match_finished_bo3": "https://www.hltv.org/matches/2369100/vitality-vs-faze-iem-katowice-2024",
+    "match_live": "https://www.hltv.org/matches/2369101/natus-vincere-vs-g2-iem-katowice-2024",
+    "stats_regulation": "https://www.hltv.org/stats/matches/mapstatsid/170001/vitality-vs-faze",
+    "stats_finished_bo3_inferno": "https://www.hltv.org/stats/matches/mapstatsid/170002/vitality-vs-faze",
+    "stats_live_ancient": "https://www.hltv.org/stats/matches/mapstatsid/170003/natus-vincere-vs-g2",
+    "stats_overtime": "https://www.hltv.org/stats/matches/mapstatsid/170004/natus-vincere-vs-g2",
+    "listing_results": "https://www.hltv.org/results",
+    "listing_upcoming": "https://www.hltv.org/matches",
+}
+
+# Parse stages of the spiders and the fixture pages they are timed on.
+STAGES = {
+    "event": (
+        match.MatchSpider,
+        "_MatchSpider__parse_event",
+        ["match_finished_bo3", "match_live"],
+    ),
+    "teams": (
+        match.MatchSpider,
+        "_MatchSpider__parse_teams",
+        ["match_finished_bo3", "match_live"],
+    ),
+    "best_of": (
+        match.MatchSpider,
+        "_MatchSpider__parse_best_of",
+        ["match_finished_bo3", "match_live"],
+    ),
+    "map_result_from_stats_link": (
+        match.MatchSpider,
+        "_MatchSpider__parse_map_result_from_stats_link",
+        ["stats_regulation", "stats_overtime"],
+    ),
+    "map_result_from_scoreboard": (
+        match.MatchSpider,
+        "_MatchSpider__parse_map_result_from_scoreboard",
+        ["match_live"],
+    ),
+    "results_listing": (
+        discovery.DiscoverySpider,
+        "_DiscoverySpider__parse_results",
+        ["listing_results"],
+    ),
+    "upcoming_listing": (
+        discovery.DiscoverySpider,
+        "_DiscoverySpider__parse_upcoming",
+        ["listing_upcoming"],
+    ),
+}
+
+
+def load_fixture(name: str) -> HtmlResponse:
+    return HtmlResponse(
+        url=FIXTURES[name],
+        body=(FIXTURES_PATH / f"{name}.html").read_bytes(),
+        encoding="utf-8",
+    )
+
+
+def percentile(sorted_values: list[float], fraction: float) -> float:
+    index = min(len(sorted_values) - 1, round(fraction * (len(sorted_values) - 1)))
+    return sorted_values[index]
+
+
+def benchmark_stage(parse, responses: list[HtmlResponse], repeat: int) -> dict:
+    latencies = list()
+    for _ in range(repeat):
+        for response in responses:
+            start = time.perf_counter()
+            parse(response)
+            latencies.append(time.perf_counter() - start)
+    latencies.sort()
+
+    # The peak memory is traced separately, since tracing slows down the timed runs.
+    tracemalloc.start()
+    for response in responses:
+        parse(response)
+    _, peak = tracemalloc.get_traced_memory()
+    tracemalloc.stop()
+
+    return {
+        "p50_us": percentile(latencies, 0.50) * 1e6,
+        "p95_us": percentile(latencies, 0.95) * 1e6,
+        "p99_us": percentile(latencies, 0.99) * 1e6,
+        "peak_kib": peak / 1024,
+    }
+
+
+def check_regressions(results: dict, baseline: dict, tolerance: float) -> list[str]:
+    regressions = list()
+    for stage, result in results.items():
+        if stage not in baseline:
+            continue
+        for metric in ("p50_us", "peak_kib"):
+            limit = baseline[stage][metric] * (1 + tolerance)
+            if result[metric] > limit:
+                regressions.append(
+                    f"{stage}: {metric} {result[metric]:.1f} exceeds the baseline "
+                    f"{baseline[stage][metric]:.1f} by more than {tolerance:.0%}"
+                )
+    return regressions
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--repeat", type=int, default=500)
+    parser.add_argument("--stage", action="append", choices=STAGES)
+    parser.add_argument("--baseline", type=Path, default=DEFAULT_BASELINE_PATH)
+    parser.add_argument("--save-baseline", action="store_true")
+    parser.add_argument(
+        "--check", action="store_true", help="Fail if a stage regressed."
+    )
+    parser.add_argument("--tolerance", type=float, default=0.25)
+    args = parser.parse_args()
+
+    responses = {name: load_fixture(name) for name in FIXTURES}
+    results = dict()
+    for stage in args.stage or STAGES:
+        spider_class, method_name, fixture_names = STAGES[stage]
+        results[stage] = benchmark_stage(
+            getattr(spider_class(), method_name),
+            [responses[name] for name in fixture_names],
+            args.repeat,
+        )
+        print(
+            f"{stage:>27}: p50 {results[stage]['p50_us']:7.1f}us, "
+            f"p95 {results[stage]['p95_us']:7.1f}us, "
+            f"p99 {results[stage]['p99_us']:7.1f}us, "
+            f"peak {results[stage]['peak_kib']:7.1f}KiB"
+        )
+
+    if args.save_baseline:
+        args.baseline.parent.mkdir(parents=True, exist_ok=True)
+        args.baseline.write_text(json.dumps(results, indent=2))
+        print(f"Saved the baseline to {args.baseline}.")
+    if args.check:
+        regressions = check_regressions(
+            results, json.loads(args.baseline.read_text()), args.tolerance
+        )
+        for regression in regressions:
+            print(regression, file=sys.stderr)
+        if regressions:
+            sys.exit(1)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,75 @@
+"""Throughput benchmark of the vectorized round prediction on synthetic round histories.
+
+Builds the features of all rounds of the synthetic maps and scores them in one batch. Run from the "backend"
+directory:
+
+    python -m benchmarks.prediction --maps 100000
+"""
+
+import argparse
+import time
+
+import numpy as np
+
+from predict.features import (
+    OVERTIME_ROUNDS,
+    REGULATION_TARGET,
+    RoundHistories,
+    build_features,
+)
+from predict.model import RoundModel
+
+
+def generate_round_lists(map_count: int, seed: int) -> list[list[bool]]:
+    """Plays random maps to 13 won rounds, with overtimes of 6 rounds after 12:12."""
+    rng = np.random.default_rng(seed)
+    strengths = rng.uniform(0.3, 0.7, map_count)
+    round_lists = list()
+    for strength in strengths:
+        outcomes = rng.random(60) < strength
+        top = np.cumsum(outcomes)
+        bottom = np.arange(1, 61) - top
+        target = REGULATION_TARGET
+        length = len(outcomes)
+        for index in range(len(outcomes)):
+            if max(top[index], bottom[index]) == target:
+                length = index + 1
+                break
+            if top[index] == bottom[index] == target - 1:
+                target += OVERTIME_ROUNDS // 2
+        round_lists.append(outcomes[:length].tolist())
+    return round_lists
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--maps", type=int, default=100_000)
+    parser.add_argument("--repeat", type=int, default=5)
+    parser.add_argument("--seed", type=int, default=0)
+    args = parser.parse_args()
+
+    round_lists = generate_round_lists(args.maps, args.seed)
+    model = RoundModel()
+
+    start = time.perf_counter()
+    histories = RoundHistories.from_round_lists(round_lists)
+    packing = time.perf_counter() - start
+    print(
+        f"Packed {args.maps} maps with {histories.total_rounds} rounds in {packing:.3f}s."
+    )
+
+    timings = list()
+    for _ in range(args.repeat):
+        start = time.perf_counter()
+        features, _, _ = build_features(histories, include_next_round=True)
+        model.predict(features)
+        timings.append(time.perf_counter() - start)
+    best = min(timings)
+    print(
+        f"Scored {len(features)} rounds in {best:.3f}s (best of {args.repeat}): "
+        f"{len(features) / best:,.0f} rounds/s"
+    )
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,145 @@
+"""Compares the slotted map results with the former ``__dict__`` classes and their compact encoding with the dicts.
+
+The memory and build time of the classes are measured, and the size and (de)serialization time of the map results as
+they are stored by the match store (JSON) and the result cache (compressed JSON).
+
+Run from the "backend" directory:
+
+    python -m benchmarks.round_history --maps 100000
+"""
+
+import argparse
+import json
+import random
+import time
+import tracemalloc
+import zlib
+
+from scrape.scrape import compact
+from scrape.scrape.spiders import match
+
+MapResult = match.MatchSpider.MapResult
+
+
+class LegacyTeamMapResult:
+    def __init__(self) -> None:
+        self.teamname: str | None = None
+        self.score: int | None = None
+        self.firsthalf: list[bool] | None = None
+        self.secondhalf: list[bool] | None = None
+        self.overtime: list[list[bool]] | None = None
+
+
+class LegacyMapResult:
+    def __init__(self) -> None:
+        self.source = MapResult.RoundHistorySource.UNKNOWN
+        self.mapname: str | None = None
+        self.toppart_team_result = LegacyTeamMapResult()
+        self.bottompart_team_result = LegacyTeamMapResult()
+
+    def to_dict(self):
+        member_dict = dict()
+        member_dict.update({"source": self.source.name})
+        member_dict.update({"mapname": self.mapname})
+        member_dict.update({"toppart_team_result": vars(self.toppart_team_result)})
+        member_dict.update(
+            {"bottompart_team_result": vars(self.bottompart_team_result)}
+        )
+        return {"map_result": member_dict}
+
+
+def generate_round_histories(count: int, seed: int = 0) -> list[tuple]:
+    """Random MR12 maps, where every tenth map went into one or two overtimes."""
+    rng = random.Random(seed)
+    histories = list()
+    for _ in range(count):
+        firsthalf = [rng.random() < 0.5 for _ in range(12)]
+        secondhalf = [rng.random() < 0.5 for _ in range(rng.randint(1, 12))]
+        overtime = [
+            [rng.random() < 0.5 for _ in range(rng.randint(4, 6))]
+            for _ in range(rng.choice([0] * 9 + [1, 2]))
+        ]
+        histories.append((firsthalf, secondhalf, overtime))
+    return histories
+
+
+def build_map_results(cls, histories: list[tuple]) -> list:
+    results = list()
+    for firsthalf, secondhalf, overtime in histories:
+        result = cls()
+        result.source = MapResult.RoundHistorySource.STATS_PAGE
+        result.mapname = "Mirage"
+        for team_result, invert in (
+            (result.toppart_team_result, False),
+            (result.bottompart_team_result, True),
+        ):
+            team_result.teamname = "Team"
+            team_result.score = 13
+            # Fresh lists per team, as the parser creates them.
+            team_result.firsthalf = [won != invert for won in firsthalf]
+            team_result.secondhalf = [won != invert for won in secondhalf]
+            team_result.overtime = [[won != invert for won in ot] for ot in overtime]
+        results.append(result)
+    return results
+
+
+def measure_memory(cls, histories: list[tuple]) -> tuple[int, list]:
+    tracemalloc.start()
+    results = build_map_results(cls, histories)
+    current, _ = tracemalloc.get_traced_memory()
+    tracemalloc.stop()
+    return current, results
+
+
+def measure_build(label: str, cls, histories: list[tuple]) -> None:
+    # Building and serializing is the path of every parsed map from the spider to the item pipelines.
+    start = time.perf_counter()
+    for result in build_map_results(cls, histories):
+        result.to_dict()
+    elapsed = time.perf_counter() - start
+    print(f"{label:>14}: built and converted to dicts in {elapsed:.3f}s")
+
+
+def measure_serialization(label: str, serialize, deserialize, map_results: list):
+    start = time.perf_counter()
+    payload = json.dumps([serialize(map_result) for map_result in map_results])
+    serialize_seconds = time.perf_counter() - start
+    start = time.perf_counter()
+    deserialized = [deserialize(value) for value in json.loads(payload)]
+    deserialize_seconds = time.perf_counter() - start
+    assert deserialized == map_results, f"The {label} map results are not lossless."
+    compressed = zlib.compress(payload.encode("utf-8"))
+    print(
+        f"{label:>14}: {len(payload) / len(map_results):7.1f} bytes/map as JSON, "
+        f"{len(compressed) / len(map_results):6.1f} compressed, "
+        f"serialized in {serialize_seconds:.3f}s, deserialized in {deserialize_seconds:.3f}s"
+    )
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--maps", type=int, default=100_000)
+    args = parser.parse_args()
+
+    histories = generate_round_histories(args.maps)
+    legacy_memory, legacy_results = measure_memory(LegacyMapResult, histories)
+    slotted_memory, slotted_results = measure_memory(MapResult, histories)
+    print(f"{'legacy memory':>14}: {legacy_memory / args.maps:7.1f} bytes/map")
+    print(f"{'slotted memory':>14}: {slotted_memory / args.maps:7.1f} bytes/map")
+
+    assert all(
+        legacy.to_dict() == slotted.to_dict()
+        for legacy, slotted in zip(legacy_results, slotted_results)
+    ), "The slotted map results do not convert to the former dicts."
+
+    measure_build("legacy", LegacyMapResult, histories)
+    measure_build("slotted", MapResult, histories)
+    map_results = [result.to_dict()["map_result"] for result in slotted_results]
+    measure_serialization("dict", lambda value: value, lambda value: value, map_results)
+    measure_serialization(
+        "compact", compact.pack_map_result, compact.unpack_map_result, map_results
+    )
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,50 @@
+"""Benchmark of the Monte Carlo series simulation, in-process and split over a process pool.
+
+Run from the "backend" directory:
+
+    python -m benchmarks.simulation --simulations 1000000 --workers 4
+"""
+
+import argparse
+import time
+
+from predict.simulate import simulate_series_parallel
+
+# Series states as (best-of, maps won, live map score).
+STATES = {
+    "bo1_start": (1, (0, 0), None),
+    "bo3_live": (3, (1, 0), (5, 8)),
+    "bo3_overtime": (3, (1, 1), (14, 13)),
+    "bo5_start": (5, (0, 0), None),
+}
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--simulations", type=int, default=1_000_000)
+    parser.add_argument("--workers", type=int, default=4)
+    parser.add_argument("--round-probability", type=float, default=0.52)
+    args = parser.parse_args()
+
+    for name, (best_of, maps_won, live_score) in STATES.items():
+        for workers in sorted({1, args.workers}):
+            start = time.perf_counter()
+            map_probability, series_probability = simulate_series_parallel(
+                best_of,
+                maps_won,
+                live_score,
+                args.round_probability,
+                args.simulations,
+                workers,
+                seed=0,
+            )
+            elapsed = time.perf_counter() - start
+            print(
+                f"{name:>12} ({workers} workers): map {map_probability:.4f}, "
+                f"series {series_probability:.4f} in {elapsed:.3f}s "
+                f"({args.simulations / elapsed:,.0f} simulations/s)"
+            )
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,102 @@
+"""Compares the single-pass round history parser of the stats pages with the former per-row parser.
+
+Checks that both parsers give the same map results for all stats page fixtures and times them per page. Run from the
+"backend" directory:
+
+    python -m benchmarks.stats_parser --repeat 2000
+"""
+
+import argparse
+import copy
+import time
+from pathlib import Path
+
+from scrapy.http import HtmlResponse
+
+from scrape.scrape.spiders import match
+
+FIXTURES_PATH = Path(__file__).parent / "fixtures"
+
+
+def legacy_parse_round_history_team_row(
+    stats_response, selector: str
+) -> list[list[bool]]:
+    output = list()
+    history = stats_response.css(selector).xpath("child::*")
+    history_part = list()
+    for item in history:
+        node = item.get()
+        node_type = item.xpath("name()").get()
+        if node_type == "img" and "round-history-team" not in node:
+            history_part.append(False if "empty" in node else True)
+        elif node_type == "div":
+            output.append(copy.deepcopy(history_part))
+            history_part.clear()
+    else:
+        if history_part:
+            output.append(copy.deepcopy(history_part))
+
+    return list(filter(lambda elem: len(elem) > 2, output))
+
+
+def legacy_parse_round_histories(stats_response) -> tuple:
+    return tuple(
+        legacy_parse_round_history_team_row(
+            stats_response, f"div.round-history-team-row:nth-child({position})"
+        )
+        for position in (1, 2)
+    )
+
+
+def get_round_histories(map_result: dict) -> tuple:
+    return tuple(
+        [team_result["firsthalf"], team_result["secondhalf"], *team_result["overtime"]]
+        for team_result in (
+            map_result["map_result"]["toppart_team_result"],
+            map_result["map_result"]["bottompart_team_result"],
+        )
+    )
+
+
+def load_stats_responses() -> dict[str, HtmlResponse]:
+    return {
+        path.stem: HtmlResponse(
+            url=f"https://www.hltv.org/stats/matches/mapstatsid/1/{path.stem}",
+            body=path.read_bytes(),
+            encoding="utf-8",
+        )
+        for path in sorted(FIXTURES_PATH.glob("stats_*.html"))
+    }
+
+
+def time_per_page(func, response, repeat: int) -> float:
+    start = time.perf_counter()
+    for _ in range(repeat):
+        func(response)
+    return (time.perf_counter() - start) / repeat
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--repeat", type=int, default=1000)
+    args = parser.parse_args()
+
+    spider = match.MatchSpider()
+    parse_stats_page = spider._MatchSpider__parse_map_result_from_stats_link
+    for name, response in load_stats_responses().items():
+        legacy_histories = legacy_parse_round_histories(response)
+        assert (
+            get_round_histories(parse_stats_page(response)) == legacy_histories
+        ), f"The round histories of {name} differ from the legacy parser."
+
+        legacy_time = time_per_page(legacy_parse_round_histories, response, args.repeat)
+        page_time = time_per_page(parse_stats_page, response, args.repeat)
+        print(
+            f"{name}: legacy round history {legacy_time * 1e6:.0f}us, "
+            f"whole single-pass stats page {page_time * 1e6:.0f}us "
+            f"({legacy_time / page_time:.1f}x)"
+        )
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,281 @@
+"""Local stand-in for HLTV, which serves the fixture pages with a configurable latency, rate limit and live matches.
+
+Every match id is served: Odd ids are live matches, whose scoreboard plays one more round every ``--round-seconds``
+from their first request on, even ids are finished matches linking to the fixture stats pages. Run from the
+"backend" directory and point the API at it, e.g.:
+
+    python -m benchmarks.stub_hltv --port 8800 --latency 0.2 --rate 20
+    FLASK_MATCH_URL_TEMPLATE="http://127.0.0.1:8800/matches/{match_id}/match" \\
+    FLASK_CRAWL_SETTINGS='{"SPIDER_ALLOWED_DOMAINS": ["127.0.0.1"], "TOKEN_BUCKET_ENABLED": false,
+    "HTTPCACHE_ENABLED": false, "PAGE_ARCHIVE_ENABLED": false}' flask run
+"""
+
+import argparse
+import math
+import random
+import re
+import threading
+import time
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+
+from .parsers import FIXTURES_PATH
+
+MATCH_PATH_PATTERN = re.compile(r"^/matches/(\d+)(/|$)")
+STATS_PATH_PATTERN = re.compile(r"^/stats/matches/mapstatsid/(\d+)(/|$)")
+# The stats pages linked by the match fixtures by their map stats id, matching the map, teams and score on the linking
+# match page, i.e. the two maps of the finished match and the first map of the live match.
+STATS_FIXTURES = {
+    170001: "stats_regulation",
+    170002: "stats_finished_bo3_inferno",
+    170003: "stats_live_ancient",
+}
+HALF_ROUNDS = 12
+REGULATION_TARGET = 13
+
+
+def read_fixture(name: str) -> str:
+    # The absolute HLTV links are served as relative ones, so the spider follows them to the stub.
+    return (
+        (FIXTURES_PATH / f"{name}.html")
+        .read_text(encoding="utf-8")
+        .replace("https://www.hltv.org", "")
+    )
+
+
+def get_live_rounds(match_id: int) -> list[bool]:
+    """Returns the rounds of the live map of a match, True if the CT team of the fixture won, up to the end of
+    regulation."""
+    rng = random.Random(match_id)
+    rounds = list()
+    while (
+        max(sum(rounds), len(rounds) - sum(rounds)) < REGULATION_TARGET
+        and len(rounds) < 2 * HALF_ROUNDS
+    ):
+        rounds.append(rng.random() < 0.5)
+    return rounds
+
+
+def render_scoreboard(page: str, rounds: list[bool]) -> str:
+    """Renders the scoreboard after the given rounds, where the CT team of the fixture (at the top) won the True ones.
+
+    Like on HLTV, the parts are the current sides: The fixture shows the second half, so in the first half its teams
+    are swapped, and the top line of every half is the round history of the team, which was CT in that half.
+    """
+
+    def render_line(wins: list[bool], icon: str) -> str:
+        return (
+            '<div class="roundHistoryLine">'
+            + "".join(
+                '<div class="historyIcon"><img src="/img/static/scoreboard/'
+                + (icon if won else "emptyHistory.svg")
+                + '" class="historyImg"></div>'
+                for won in wins
+            )
+            + "</div>"
+        )
+
+    def render_half(name: str, half: list[bool]) -> str:
+        return (
+            f'<div class="{name}">'
+            + render_line(half, "ct_win.svg")
+            + render_line([not won for won in half], "t_win.svg")
+            + "</div>"
+        )
+
+    top_score = sum(rounds)
+    bottom_score = len(rounds) - top_score
+    if len(rounds) < HALF_ROUNDS:
+        page = (
+            page.replace('class="ctTeamHeaderBg"', 'class="swappedHeaderBg"')
+            .replace('class="tTeamHeaderBg"', 'class="ctTeamHeaderBg"')
+            .replace('class="swappedHeaderBg"', 'class="tTeamHeaderBg"')
+        )
+        top_score, bottom_score = bottom_score, top_score
+    page = re.sub(
+        r'<div class="firstHalf">.*</div>\n',
+        render_half("firstHalf", [not won for won in rounds[:HALF_ROUNDS]]) + "\n",
+        page,
+    )
+    page = re.sub(
+        r'<div class="secondHalf">.*</div>\n',
+        render_half("secondHalf", rounds[HALF_ROUNDS:]) + "\n",
+        page,
+    )
+    page = re.sub(
+        r'<span class="ctScore">\d+</span>:<span class="tScore">\d+</span>',
+        f'<span class="ctScore">{top_score}</span>:'
+        f'<span class="tScore">{bottom_score}</span>',
+        page,
+    )
+    return re.sub(
+        r'<span class="currentRound">Round \d+</span>',
+        f'<span class="currentRound">Round {len(rounds) + 1}</span>',
+        page,
+    )
+
+
+class StubHltv:
+    """The pages and the shared state (rate limit, live clocks and counts) of the stub server."""
+
+    def __init__(
+        self,
+        latency: float,
+        jitter: float,
+        rate: float | None,
+        burst: float,
+        error_rate: float,
+        round_seconds: float,
+    ) -> None:
+        self.latency = latency
+        self.jitter = jitter
+        self.rate = rate
+        self.burst = burst
+        self.error_rate = error_rate
+        self.round_seconds = round_seconds
+        self.pages = {
+            name: read_fixture(name)
+            for name in ("match_finished_bo3", "match_live", *STATS_FIXTURES.values())
+        }
+        self.tokens = burst
+        self.updated_at = time.monotonic()
+        self.live_started_at: dict[int, float] = dict()
+        self.counts: dict[str, int] = dict()
+        self._lock = threading.Lock()
+
+    def count(self, key: str) -> None:
+        with self._lock:
+            self.counts[key] = self.counts.get(key, 0) + 1
+
+    def take_token(self) -> float:
+        """Takes a token of the rate limit and returns 0 or returns the seconds until a token is available."""
+        if self.rate is None:
+            return 0
+        with self._lock:
+            now = time.monotonic()
+            self.tokens = min(
+                self.burst, self.tokens + (now - self.updated_at) * self.rate
+            )
+            self.updated_at = now
+            if self.tokens >= 1:
+                self.tokens -= 1
+                return 0
+            return (1 - self.tokens) / self.rate
+
+    def get_page(self, path: str) -> str | None:
+        match = MATCH_PATH_PATTERN.match(path)
+        if match is not None:
+            match_id = int(match.group(1))
+            if match_id % 2 == 0:
+                return self.pages["match_finished_bo3"]
+            with self._lock:
+                started_at = self.live_started_at.setdefault(match_id, time.monotonic())
+            rounds = get_live_rounds(match_id)
+            played = int((time.monotonic() - started_at) / self.round_seconds)
+            return render_scoreboard(self.pages["match_live"], rounds[:played])
+        match = STATS_PATH_PATTERN.match(path)
+        if match is not None and int(match.group(1)) in STATS_FIXTURES:
+            return self.pages[STATS_FIXTURES[int(match.group(1))]]
+        return None
+
+
+class StubHandler(BaseHTTPRequestHandler):
+    server: "StubServer"
+
+    def do_GET(self):
+        stub = self.server.stub
+        time.sleep(max(0.0, stub.latency + random.uniform(-stub.jitter, stub.jitter)))
+        if self.path == "/robots.txt":
+            stub.count("robots")
+            self.send_body(200, "User-agent: *\nAllow: /\n", "text/plain")
+            return
+        wait = stub.take_token()
+        if wait:
+            stub.count("429")
+            self.send_response(429)
+            self.send_header("Retry-After", str(math.ceil(wait)))
+            self.send_header("Content-Length", "0")
+            self.end_headers()
+            return
+        if random.random() < stub.error_rate:
+            stub.count("503")
+            self.send_body(503, "Service Unavailable", "text/plain")
+            return
+        page = stub.get_page(self.path.split("?")[0])
+        if page is None:
+            stub.count("404")
+            self.send_body(404, "Not Found", "text/plain")
+            return
+        stub.count("200")
+        self.send_body(200, page, "text/html; charset=utf-8")
+
+    def send_body(self, status: int, body: str, content_type: str) -> None:
+        encoded = body.encode("utf-8")
+        self.send_response(status)
+        self.send_header("Content-Type", content_type)
+        self.send_header("Content-Length", str(len(encoded)))
+        self.end_headers()
+        self.wfile.write(encoded)
+
+    def log_message(self, format, *args):
+        pass
+
+
+class StubServer(ThreadingHTTPServer):
+    daemon_threads = True
+
+    def __init__(self, address, stub: StubHltv) -> None:
+        super().__init__(address, StubHandler)
+        self.stub = stub
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--host", default="127.0.0.1")
+    parser.add_argument("--port", type=int, default=8800)
+    parser.add_argument(
+        "--latency", type=float, default=0.1, help="Mean response latency [s]."
+    )
+    parser.add_argument(
+        "--jitter", type=float, default=0.05, help="Uniform latency jitter [s]."
+    )
+    parser.add_argument(
+        "--rate",
+        type=float,
+        help="Page requests per second, above which 429 is answered [default: unlimited].",
+    )
+    parser.add_argument("--burst", type=float, default=10)
+    parser.add_argument(
+        "--error-rate", type=float, default=0.0, help="Fraction answered with 503."
+    )
+    parser.add_argument(
+        "--round-seconds",
+        type=float,
+        default=5.0,
+        help="Seconds per round of the live matches.",
+    )
+    args = parser.parse_args()
+
+    stub = StubHltv(
+        args.latency,
+        args.jitter,
+        args.rate,
+        args.burst,
+        args.error_rate,
+        args.round_seconds,
+    )
+    server = StubServer((args.host, args.port), stub)
+    print(f"Serving the HLTV stub on http://{args.host}:{args.port}")
+    try:
+        server.serve_forever()
+    except KeyboardInterrupt:
+        pass
+    finally:
+        server.server_close()
+        print(
+            "Responses: "
+            + ", ".join(f"{key} {count}" for key, count in sorted(stub.counts.items()))
+        )
+
+
+if __name__ == "__main__":
+    main()
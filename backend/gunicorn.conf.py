@@ -0,0 +1,29 @@
+# Prefork configuration of the API, run from the "backend" directory:
+#
+#     gunicorn
+#
+# The master process imports the app, the Scrapy stack and the models once, before it forks the workers, so every
+# worker starts warm. The app itself (and so its SQLite connections) is still created in every worker, since
+# connections must not be shared across a fork. Every worker starts its crawl engine right away instead of on its first
+# crawl. The live matches are tracked per worker as well, so a match streamed by several workers is polled by each of
+# them, though their downloads share the HTTP cache and the token bucket.
+import os
+
+import predict.model  # noqa: F401
+import predict.simulate  # noqa: F401
+from api import engine
+
+wsgi_app = "api:create_app()"
+bind = os.environ.get("HMP_BIND", "127.0.0.1:8000")
+workers = int(os.environ.get("HMP_WORKERS", 2 * os.cpu_count() + 1))
+# Streamed and long-polling responses hold a thread, while they are open.
+worker_class = "gthread"
+threads = int(os.environ.get("HMP_THREADS", 8))
+timeout = 120
+
+engine.preload()
+
+
+def post_worker_init(worker):
+    # The reactor thread is started after the fork, since threads do not survive it.
+    engine.get_engine().start()
@@ -0,0 +1,245 @@
+import json
+import os
+from datetime import datetime, timezone
+from pathlib import Path
+
+import numpy as np
+
+from .features import RoundHistories, get_top_team_rounds
+from .series import get_finished_maps, get_first_half_teams, get_played_maps
+
+SOURCES = ("UNKNOWN", "SCOREBOARD", "STATS_PAGE")
+DICTIONARIES = ("events", "teams", "maps")
+UNKNOWN_MONTH = "unknown"
+
+# Columns of every table and their types. Strings are stored as codes into the dictionaries of the dataset.
+TABLES = {
+    "matches": {
+        "match_id": np.int64,
+        "datetime": np.int64,  # unix seconds (UTC), -1 if unknown
+        "event": np.int32,
+        "best_of": np.int8,
+        "team1": np.int32,
+        "team2": np.int32,
+    },
+    "maps": {
+        "match_id": np.int64,
+        "map_number": np.int8,
+        "mapname": np.int32,
+        "source": np.int8,
+        "top_team": np.int32,
+        "bottom_team": np.int32,
+        "top_score": np.int16,
+        "bottom_score": np.int16,
+        "round_offset": np.int64,  # first round of the map in the rounds of the part
+        "round_count": np.int16,
+    },
+    "rounds": {
+        "outcome": np.int8,  # 1 if the top team of the first half won the round
+    },
+}
+
+
+class Dictionary:
+    """Append-only string dictionary, so the codes of already exported strings never change."""
+
+    def __init__(self, values: list[str] | None = None) -> None:
+        self.values = list(values or list())
+        self.codes = {value: code for code, value in enumerate(self.values)}
+
+    def encode(self, value: str | None) -> int:
+        if value is None:
+            return -1
+        code = self.codes.get(value)
+        if code is None:
+            code = self.codes[value] = len(self.values)
+            self.values.append(value)
+        return code
+
+    def decode(self, codes: np.ndarray) -> np.ndarray:
+        values = np.array(self.values + [None], dtype=object)
+        return values[codes]
+
+
+class Part:
+    """One appended chunk of a month partition, whose columns are memory-mapped on first access."""
+
+    def __init__(self, path: Path) -> None:
+        self.path = path
+        self.month = path.parent.name
+
+    def column(self, table: str, column: str) -> np.ndarray:
+        return np.load(self.path / f"{table}.{column}.npy", mmap_mode="r")
+
+    def table(self, table: str) -> dict[str, np.ndarray]:
+        return {column: self.column(table, column) for column in TABLES[table]}
+
+
+class Dataset:
+    """Columnar dataset of the stored matches, partitioned by month and appended to in parts.
+
+    Every column of a part is one ``.npy`` file, so the loader maps it into memory without copying or parsing it.
+    """
+
+    def __init__(self, path) -> None:
+        self.path = Path(path)
+        self.dictionaries = {
+            name: Dictionary(self._read_dictionary(name)) for name in DICTIONARIES
+        }
+
+    def _read_dictionary(self, name: str) -> list[str] | None:
+        path = self.path / f"{name}.json"
+        return json.loads(path.read_text(encoding="utf-8")) if path.exists() else None
+
+    def _write_dictionaries(self) -> None:
+        for name, dictionary in self.dictionaries.items():
+            path = self.path / f"{name}.json"
+            temporary_path = path.with_suffix(f".{os.getpid()}.tmp")
+            temporary_path.write_text(
+                json.dumps(dictionary.values, ensure_ascii=False), encoding="utf-8"
+            )
+            temporary_path.replace(path)
+
+    def get_parts(self, months: list[str] | None = None) -> list[Part]:
+        return [
+            Part(path)
+            for path in sorted(self.path.glob("*/part-*"))
+            if path.is_dir() and (months is None or path.parent.name in months)
+        ]
+
+    def get_match_ids(self) -> set[int]:
+        match_ids = set()
+        for part in self.get_parts():
+            match_ids.update(part.column("matches", "match_id").tolist())
+        return match_ids
+
+    def load_column(
+        self, table: str, column: str, months: list[str] | None = None
+    ) -> np.ndarray:
+        """Concatenates a column of all (or the given months') parts, which copies it into memory."""
+        columns = [part.column(table, column) for part in self.get_parts(months)]
+        if not columns:
+            return np.empty(0, dtype=TABLES[table][column])
+        return np.concatenate(columns)
+
+    def load_round_histories(self, months: list[str] | None = None) -> RoundHistories:
+        outcomes = list()
+        lengths = list()
+        for part in self.get_parts(months):
+            outcomes.append(part.column("rounds", "outcome"))
+            lengths.append(part.column("maps", "round_count"))
+        if not outcomes:
+            return RoundHistories.from_flat(np.empty(0, np.int8), np.empty(0, np.int32))
+        return RoundHistories.from_flat(
+            np.concatenate(outcomes), np.concatenate(lengths)
+        )
+
+    def export(
+        self, records, finished_only: bool = True, part_size: int = 10000
+    ) -> int:
+        """Appends the given records (ordered by their datetime) as new parts of their month partitions.
+
+        Matches, which were already exported, are skipped. Returns the number of exported matches.
+        """
+        self.path.mkdir(parents=True, exist_ok=True)
+        exported_ids = self.get_match_ids()
+        writer = None
+        exported = 0
+        for record in records:
+            if record["match_id"] in exported_ids:
+                continue
+            if finished_only and get_finished_maps(record) is None:
+                continue
+            month = get_month(record)
+            if writer is not None and (
+                writer.month != month or writer.match_count >= part_size
+            ):
+                self._write_part(writer)
+                writer = None
+            if writer is None:
+                writer = PartWriter(month, self.dictionaries)
+            writer.add(record)
+            exported_ids.add(record["match_id"])
+            exported += 1
+        if writer is not None:
+            self._write_part(writer)
+        return exported
+
+    def _write_part(self, writer: "PartWriter") -> None:
+        # The dictionaries are written first, so a part never references codes, which are not stored yet.
+        self._write_dictionaries()
+        partition = self.path / writer.month
+        partition.mkdir(exist_ok=True)
+        part_number = len(list(partition.glob("part-*")))
+        temporary_path = partition / f".part-{part_number:05d}.{os.getpid()}.tmp"
+        temporary_path.mkdir()
+        for table, columns in writer.get_columns().items():
+            for column, values in columns.items():
+                np.save(temporary_path / f"{table}.{column}.npy", values)
+        temporary_path.rename(partition / f"part-{part_number:05d}")
+
+
+class PartWriter:
+    def __init__(self, month: str, dictionaries: dict[str, Dictionary]) -> None:
+        self.month = month
+        self.dictionaries = dictionaries
+        self.columns = {
+            table: {column: list() for column in columns}
+            for table, columns in TABLES.items()
+        }
+        self.match_count = 0
+
+    def add(self, record: dict) -> None:
+        teams = self.dictionaries["teams"]
+        teamnames = list(record.get("teams") or dict()) + [None, None]
+        event = record.get("event") or dict()
+        matches = self.columns["matches"]
+        matches["match_id"].append(record["match_id"])
+        matches["datetime"].append(
+            int(
+                datetime.fromisoformat(event["datetime"])
+                .replace(tzinfo=timezone.utc)
+                .timestamp()
+            )
+            if event.get("datetime")
+            else -1
+        )
+        matches["event"].append(self.dictionaries["events"].encode(event.get("name")))
+        matches["best_of"].append(record.get("best_of") or 0)
+        matches["team1"].append(teams.encode(teamnames[0]))
+        matches["team2"].append(teams.encode(teamnames[1]))
+
+        maps = self.columns["maps"]
+        outcomes = self.columns["rounds"]["outcome"]
+        # The placeholders of unplayed maps, e.g. of a series decided early, are no maps of the dataset.
+        for map_number, map_result in enumerate(get_played_maps(record)):
+            rounds = get_top_team_rounds(map_result)
+            top_team, bottom_team = get_first_half_teams(map_result)
+            maps["match_id"].append(record["match_id"])
+            maps["map_number"].append(map_number)
+            maps["mapname"].append(
+                self.dictionaries["maps"].encode(map_result["mapname"])
+            )
+            maps["source"].append(SOURCES.index(map_result["source"]))
+            maps["top_team"].append(teams.encode(top_team))
+            maps["bottom_team"].append(teams.encode(bottom_team))
+            maps["top_score"].append(sum(rounds))
+            maps["bottom_score"].append(len(rounds) - sum(rounds))
+            maps["round_offset"].append(len(outcomes))
+            maps["round_count"].append(len(rounds))
+            outcomes.extend(rounds)
+        self.match_count += 1
+
+    def get_columns(self) -> dict[str, dict[str, np.ndarray]]:
+        return {
+            table: {
+                column: np.array(values, dtype=TABLES[table][column])
+                for column, values in columns.items()
+            }
+            for table, columns in self.columns.items()
+        }
+
+
+def get_month(record: dict) -> str:
+    event_datetime = (record.get("event") or dict()).get("datetime")
+    return event_datetime[:7] if event_datetime else UNKNOWN_MONTH
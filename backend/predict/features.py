@@ -0,0 +1,118 @@
+import numpy as np
+
+from .series import HALF_ROUNDS, get_top_team_rounds
+
+REGULATION_ROUNDS = 2 * HALF_ROUNDS
+OVERTIME_ROUNDS = 6
+REGULATION_TARGET = HALF_ROUNDS + 1
+OVERTIME_TARGET = REGULATION_TARGET + OVERTIME_ROUNDS // 2
+
+FEATURE_NAMES = (
+    "score_diff",
+    "top_score",
+    "bottom_score",
+    "round_index",
+    "is_second_half",
+    "is_overtime",
+    "is_pistol_round",
+    "streak",
+    "top_rounds_to_win",
+    "bottom_rounds_to_win",
+)
+
+
+class RoundHistories:
+    """Round outcomes of many maps in one padded matrix, where 1/0 is a won/lost round of the top team and -1 pads."""
+
+    def __init__(self, outcomes: np.ndarray, lengths: np.ndarray) -> None:
+        self.outcomes = outcomes
+        self.lengths = lengths
+
+    @classmethod
+    def from_flat(cls, flat: np.ndarray, lengths: np.ndarray):
+        """Creates the histories from the concatenated outcomes of all maps and the number of rounds per map."""
+        lengths = np.asarray(lengths, dtype=np.int32)
+        # One column more than the longest map, so the upcoming round of every map can be scored as well.
+        width = int(lengths.max(initial=0)) + 1
+        outcomes = np.full((len(lengths), width), -1, dtype=np.int8)
+        outcomes[np.arange(width) < lengths[:, None]] = flat
+        return cls(outcomes, lengths)
+
+    @classmethod
+    def from_round_lists(cls, round_lists: list[list[bool]]):
+        lengths = np.fromiter(
+            map(len, round_lists), dtype=np.int32, count=len(round_lists)
+        )
+        flat = np.fromiter(
+            (won for rounds in round_lists for won in rounds),
+            dtype=np.int8,
+            count=int(lengths.sum()),
+        )
+        return cls.from_flat(flat, lengths)
+
+    @classmethod
+    def from_map_results(cls, map_results: list[dict]):
+        return cls.from_round_lists(
+            [get_top_team_rounds(map_result) for map_result in map_results]
+        )
+
+    @property
+    def total_rounds(self) -> int:
+        return int(self.lengths.sum())
+
+
+def build_features(
+    histories: RoundHistories, include_next_round: bool = False
+) -> tuple[np.ndarray, np.ndarray, np.ndarray]:
+    """Builds the features of every round from the game state before the round, for all maps at once.
+
+    Returns the feature matrix (one row per round in map-major order), the outcomes of the rounds (-1 for the upcoming
+    rounds) and the map index of every row.
+    """
+    outcomes = histories.outcomes
+    round_index = np.arange(outcomes.shape[1], dtype=np.int16)
+    won = (outcomes == 1).astype(np.int16)
+    lost = (outcomes == 0).astype(np.int16)
+    top_score = np.cumsum(won, axis=1) - won
+    bottom_score = np.cumsum(lost, axis=1) - lost
+
+    is_overtime = round_index >= REGULATION_ROUNDS
+    overtime_block = np.maximum(round_index - REGULATION_ROUNDS, 0) // OVERTIME_ROUNDS
+    target = np.where(
+        is_overtime,
+        OVERTIME_TARGET + overtime_block * (OVERTIME_ROUNDS // 2),
+        REGULATION_TARGET,
+    )
+
+    # The streak before a round is the signed length of the run of equal outcomes, which ended with the last round.
+    changes = np.ones(outcomes.shape, dtype=bool)
+    changes[:, 1:] = outcomes[:, 1:] != outcomes[:, :-1]
+    run_start = np.maximum.accumulate(np.where(changes, round_index, 0), axis=1)
+    run_length = round_index - run_start + 1
+    signed_run_length = np.where(outcomes == 1, run_length, -run_length)
+    streak = np.zeros(outcomes.shape, dtype=np.int16)
+    streak[:, 1:] = signed_run_length[:, :-1]
+
+    columns = (
+        top_score - bottom_score,
+        top_score,
+        bottom_score,
+        np.broadcast_to(round_index, outcomes.shape),
+        np.broadcast_to((round_index >= HALF_ROUNDS) & ~is_overtime, outcomes.shape),
+        np.broadcast_to(is_overtime, outcomes.shape),
+        np.broadcast_to(
+            (round_index == 0) | (round_index == HALF_ROUNDS), outcomes.shape
+        ),
+        streak,
+        target - top_score,
+        target - bottom_score,
+    )
+    lengths = histories.lengths[:, None] + (1 if include_next_round else 0)
+    mask = round_index < lengths
+    features = np.empty((int(mask.sum()), len(columns)), dtype=np.float32)
+    for index, column in enumerate(columns):
+        features[:, index] = column[mask]
+    map_index = np.broadcast_to(np.arange(outcomes.shape[0])[:, None], outcomes.shape)[
+        mask
+    ]
+    return features, outcomes[mask], map_index
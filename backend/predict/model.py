@@ -0,0 +1,141 @@
+import numpy as np
+
+from .features import FEATURE_NAMES, RoundHistories, build_features
+from .series import get_first_half_teams, get_played_maps, is_played_map
+
+# Untrained defaults: The team ahead on the scoreboard and on a winning streak is slightly favoured.
+DEFAULT_WEIGHTS = {"score_diff": 0.05, "streak": 0.03}
+
+
+class RoundModel:
+    """Logistic model of the probability, that the top team wins a round, given the state before the round."""
+
+    def __init__(
+        self,
+        weights: np.ndarray | None = None,
+        bias: float = 0.0,
+        mean: np.ndarray | None = None,
+        scale: np.ndarray | None = None,
+    ) -> None:
+        feature_count = len(FEATURE_NAMES)
+        if weights is None:
+            weights = np.array(
+                [DEFAULT_WEIGHTS.get(name, 0.0) for name in FEATURE_NAMES],
+                dtype=np.float32,
+            )
+        self.weights = weights.astype(np.float32)
+        self.bias = float(bias)
+        self.mean = (
+            np.zeros(feature_count, np.float32)
+            if mean is None
+            else mean.astype(np.float32)
+        )
+        self.scale = (
+            np.ones(feature_count, np.float32)
+            if scale is None
+            else scale.astype(np.float32)
+        )
+
+    @classmethod
+    def load(cls, path):
+        with np.load(path) as model:
+            return cls(
+                model["weights"], float(model["bias"]), model["mean"], model["scale"]
+            )
+
+    def save(self, path) -> None:
+        np.savez(
+            path,
+            weights=self.weights,
+            bias=np.float32(self.bias),
+            mean=self.mean,
+            scale=self.scale,
+        )
+
+    def predict(self, features: np.ndarray) -> np.ndarray:
+        logits = ((features - self.mean) / self.scale) @ self.weights + self.bias
+        return 1.0 / (1.0 + np.exp(-logits))
+
+    def fit(
+        self,
+        features: np.ndarray,
+        outcomes: np.ndarray,
+        epochs: int = 200,
+        learning_rate: float = 0.1,
+    ) -> None:
+        """Fits the model with full-batch gradient descent on the log loss."""
+        self.mean = features.mean(axis=0)
+        self.scale = features.std(axis=0)
+        self.scale[self.scale == 0] = 1.0
+        standardized = (features - self.mean) / self.scale
+        targets = outcomes.astype(np.float32)
+        weights = np.zeros(features.shape[1], dtype=np.float32)
+        bias = 0.0
+        for _ in range(epochs):
+            logits = standardized @ weights + bias
+            errors = 1.0 / (1.0 + np.exp(-logits)) - targets
+            weights -= learning_rate * (standardized.T @ errors) / len(targets)
+            bias -= learning_rate * float(errors.mean())
+        self.weights = weights
+        self.bias = bias
+
+
+def score_map_results(
+    model: RoundModel, map_results: list[dict], include_next_round: bool = True
+) -> list[np.ndarray]:
+    """Scores all rounds of all given maps in one batch and returns the win probabilities of the top team per map.
+
+    Unplayed maps (placeholders of the scoreboard) are not scored, but get no probabilities.
+    """
+    played = [is_played_map(map_result) for map_result in map_results]
+    played_map_results = [
+        map_result for map_result, is_played in zip(map_results, played) if is_played
+    ]
+    histories = RoundHistories.from_map_results(played_map_results)
+    features, _, map_index = build_features(histories, include_next_round)
+    probabilities = model.predict(features)
+    # The rows are ordered by map, so the probabilities only have to be split at the map boundaries.
+    boundaries = np.searchsorted(map_index, np.arange(1, len(played_map_results)))
+    played_probabilities = iter(np.split(probabilities, boundaries))
+    return [
+        next(played_probabilities) if is_played else np.empty(0) for is_played in played
+    ]
+
+
+def predict_matches(model: RoundModel, records: list[dict]) -> dict[int, list[dict]]:
+    """Predicts every played and the upcoming round of all maps of the given match records in one batch."""
+    map_results = [
+        map_result for record in records for map_result in get_played_maps(record)
+    ]
+    probabilities = iter(score_map_results(model, map_results))
+
+    def get_prediction(map_result: dict) -> dict:
+        # The probabilities are the ones of the team at the top in the first half, which the scoreboard moves after it.
+        top_team, bottom_team = get_first_half_teams(map_result)
+        return {
+            "mapname": map_result["mapname"],
+            "source": map_result["source"],
+            "top_team": top_team,
+            "bottom_team": bottom_team,
+            "round_win_probabilities": next(probabilities)
+            .astype(float)
+            .round(4)
+            .tolist(),
+        }
+
+    predictions = dict()
+    for record in records:
+        predictions[record["match_id"]] = [
+            get_prediction(map_result) for map_result in get_played_maps(record)
+        ]
+    return predictions
+
+
+def train_model(records, epochs: int = 200) -> RoundModel:
+    map_results = [
+        map_result for record in records for map_result in get_played_maps(record)
+    ]
+    features, outcomes, _ = build_features(RoundHistories.from_map_results(map_results))
+    model = RoundModel()
+    model.fit(features, outcomes, epochs=epochs)
+    return model
@@ -0,0 +1,174 @@
+import sqlite3
+import threading
+
+from .series import get_finished_maps
+
+INITIAL_RATING = 1500.0
+K_FACTOR = 32.0
+
+
+def get_expected_score(rating: float, opponent_rating: float) -> float:
+    return 1 / (1 + 10 ** ((opponent_rating - rating) / 400))
+
+
+class RatingIndex:
+    """Elo ratings of the teams, of the teams per map and of the players, held in memory for constant time lookups.
+
+    Every finished match updates the ratings once, when it is added, and only the changed ratings are written to the
+    SQLite snapshot, from which the index is loaded again on start.
+    """
+
+    def __init__(self, path, k_factor: float = K_FACTOR) -> None:
+        self.k_factor = k_factor
+        self.teams: dict[str, float] = dict()
+        self.maps: dict[tuple[str, str], float] = dict()
+        self.players: dict[str, float] = dict()
+        self.rated_matches: set[int] = set()
+        self._pending: list[tuple] = list()
+        self._pending_matches: list[tuple[int]] = list()
+        self._lock = threading.Lock()
+        self._connection = sqlite3.connect(path, timeout=30, check_same_thread=False)
+        with self._connection:
+            self._connection.executescript("""
+                CREATE TABLE IF NOT EXISTS ratings (
+                    kind TEXT NOT NULL,
+                    name TEXT NOT NULL,
+                    mapname TEXT NOT NULL DEFAULT '',
+                    rating REAL NOT NULL,
+                    PRIMARY KEY (kind, name, mapname)
+                );
+                CREATE TABLE IF NOT EXISTS rated_matches (match_id INTEGER PRIMARY KEY);
+                """)
+        self._load()
+
+    def _load(self) -> None:
+        ratings = {"team": self.teams, "player": self.players}
+        for kind, name, mapname, rating in self._connection.execute(
+            "SELECT kind, name, mapname, rating FROM ratings"
+        ):
+            if kind == "map":
+                self.maps[(name, mapname)] = rating
+            else:
+                ratings[kind][name] = rating
+        self.rated_matches.update(
+            match_id
+            for (match_id,) in self._connection.execute(
+                "SELECT match_id FROM rated_matches"
+            )
+        )
+
+    def get_team_rating(self, team: str, mapname: str | None = None) -> float:
+        if mapname is not None:
+            return self.maps.get((team, mapname), INITIAL_RATING)
+        return self.teams.get(team, INITIAL_RATING)
+
+    def get_lineup_rating(self, players: list[str]) -> float:
+        if not players:
+            return INITIAL_RATING
+        return sum(
+            self.players.get(player, INITIAL_RATING) for player in players
+        ) / len(players)
+
+    def get_ratings(self, teams: dict[str, list[str]]) -> dict[str, dict]:
+        return {
+            team: {
+                "rating": round(self.get_team_rating(team), 1),
+                "lineup_rating": round(self.get_lineup_rating(players or list()), 1),
+            }
+            for team, players in teams.items()
+        }
+
+    def add(self, record: dict, commit: bool = True) -> bool:
+        """Updates the ratings with a finished match, which was not rated before, and returns whether it was rated."""
+        finished_maps = get_finished_maps(record)
+        if finished_maps is None:
+            return False
+
+        match_id = record["match_id"]
+        lineups = record["teams"]
+        with self._lock:
+            if match_id in self.rated_matches:
+                return False
+            for mapname, winner, loser in finished_maps:
+                self._pending.extend(self._update_teams(winner, loser, mapname))
+                self._pending.extend(
+                    self._update_lineups(
+                        lineups[winner] or list(), lineups[loser] or list()
+                    )
+                )
+            self.rated_matches.add(match_id)
+            self._pending_matches.append((match_id,))
+            if commit:
+                self._flush()
+        return True
+
+    def _flush(self) -> None:
+        with self._connection:
+            self._connection.executemany(
+                "INSERT OR REPLACE INTO ratings VALUES (?, ?, ?, ?)", self._pending
+            )
+            self._connection.executemany(
+                "INSERT OR IGNORE INTO rated_matches VALUES (?)", self._pending_matches
+            )
+        self._pending.clear()
+        self._pending_matches.clear()
+
+    def _update_teams(self, winner: str, loser: str, mapname: str) -> list[tuple]:
+        changed = list()
+        for kind, ratings, winner_key, loser_key in (
+            ("team", self.teams, winner, loser),
+            ("map", self.maps, (winner, mapname), (loser, mapname)),
+        ):
+            winner_rating = ratings.get(winner_key, INITIAL_RATING)
+            loser_rating = ratings.get(loser_key, INITIAL_RATING)
+            delta = self.k_factor * (
+                1 - get_expected_score(winner_rating, loser_rating)
+            )
+            ratings[winner_key] = winner_rating + delta
+            ratings[loser_key] = loser_rating - delta
+            mapname_column = mapname if kind == "map" else ""
+            changed.append((kind, winner, mapname_column, ratings[winner_key]))
+            changed.append((kind, loser, mapname_column, ratings[loser_key]))
+        return changed
+
+    def _update_lineups(self, winners: list[str], losers: list[str]) -> list[tuple]:
+        # Every player of a lineup gains/loses the same, as expected from the average ratings of both lineups.
+        delta = self.k_factor * (
+            1
+            - get_expected_score(
+                self.get_lineup_rating(winners), self.get_lineup_rating(losers)
+            )
+        )
+        changed = list()
+        for players, sign in ((winners, 1), (losers, -1)):
+            for player in players:
+                rating = self.players.get(player, INITIAL_RATING) + sign * delta
+                self.players[player] = rating
+                changed.append(("player", player, "", rating))
+        return changed
+
+    def rebuild(self, records, batch_size: int = 1000) -> int:
+        """Drops all ratings and rates the given records (ordered by their datetime) again in one streaming pass.
+
+        The changed ratings are written every ``batch_size`` matches, so only one batch is held besides the index.
+        """
+        with self._lock, self._connection:
+            self._connection.execute("DELETE FROM ratings")
+            self._connection.execute("DELETE FROM rated_matches")
+            self.teams.clear()
+            self.maps.clear()
+            self.players.clear()
+            self.rated_matches.clear()
+        rated = 0
+        for record in records:
+            if self.add(record, commit=False):
+                rated += 1
+                if rated % batch_size == 0:
+                    with self._lock:
+                        self._flush()
+        with self._lock:
+            self._flush()
+        return rated
+
+    def close(self) -> None:
+        self._connection.close()
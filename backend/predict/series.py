@@ -0,0 +1,109 @@
+HALF_ROUNDS = 12
+
+
+def get_top_team_rounds(map_result: dict) -> list[bool]:
+    """Returns the outcomes of all rounds of the map from the perspective of the team at the top in the first half."""
+    top = map_result["toppart_team_result"]
+    bottom = map_result["bottompart_team_result"]
+    # On the scoreboard the teams switch the top and bottom part for the second half (see the match spider).
+    secondhalf = (
+        bottom["secondhalf"]
+        if map_result["source"] == "SCOREBOARD"
+        else top["secondhalf"]
+    )
+    rounds = list(top["firsthalf"] or list())
+    rounds.extend(secondhalf or list())
+    for overtime in top["overtime"] or list():
+        rounds.extend(overtime)
+    return rounds
+
+
+def get_first_half_teams(map_result: dict) -> tuple[str | None, str | None]:
+    """Returns the team at the top in the first half, i.e. the perspective of ``get_top_team_rounds``, and its opponent.
+
+    The parts of the scoreboard are the current sides, so the team at the top in the first half is at the bottom, once
+    the second half started (and stays there in overtime). The parts of a stats page never switch.
+    """
+    top = map_result["toppart_team_result"]
+    bottom = map_result["bottompart_team_result"]
+    if map_result["source"] == "SCOREBOARD":
+        if top["score"] is not None and bottom["score"] is not None:
+            played = top["score"] + bottom["score"]
+        else:
+            played = len(get_top_team_rounds(map_result))
+        if played >= HALF_ROUNDS:
+            return bottom["teamname"], top["teamname"]
+    return top["teamname"], bottom["teamname"]
+
+
+def get_map_score(map_result: dict, first_team: str | None) -> tuple[int, int]:
+    """Returns the rounds won of the first team and of its opponent on the map.
+
+    The score is read from the score of every part, keyed by its team, since the round history of the scoreboard ends
+    with the second half, while the score also counts the rounds of the overtimes. Without scores, the rounds of the
+    round history are counted. If the first team is not on the map, the team at the top is the perspective.
+    """
+    top = map_result["toppart_team_result"]
+    bottom = map_result["bottompart_team_result"]
+    if top["score"] is not None and bottom["score"] is not None:
+        scores = (top["score"], bottom["score"])
+        teamnames = (top["teamname"], bottom["teamname"])
+    else:
+        rounds = get_top_team_rounds(map_result)
+        scores = (sum(rounds), len(rounds) - sum(rounds))
+        teamnames = get_first_half_teams(map_result)
+    if first_team is not None and teamnames[1] == first_team:
+        return scores[::-1]
+    return scores
+
+
+def is_played_map(map_result: dict) -> bool:
+    """Returns whether the map was (or is being) played.
+
+    The spider yields an empty scoreboard map for a map, which is not played (yet), e.g. the third map of a best of
+    three, which ended 2:0.
+    """
+    return bool(
+        map_result["toppart_team_result"]["teamname"]
+        or map_result["bottompart_team_result"]["teamname"]
+        or get_top_team_rounds(map_result)
+    )
+
+
+def get_played_maps(record: dict) -> list[dict]:
+    return [
+        map_result for map_result in record["map_results"] if is_played_map(map_result)
+    ]
+
+
+def get_finished_maps(record: dict) -> list[tuple[str, str, str]] | None:
+    """Returns the map name, winner and loser of every played map of a finished match or ``None``, if it is not
+    finished yet.
+
+    A match is finished, once one team won the majority of its maps and all played maps got parsed from their stats
+    pages. The unplayed maps of a series, which was decided early, are ignored.
+    """
+    teamnames = set(record.get("teams") or dict())
+    maps = list()
+    wins = dict()
+    for map_result in get_played_maps(record):
+        if map_result["source"] != "STATS_PAGE":
+            return None
+        rounds = get_top_team_rounds(map_result)
+        top = map_result["toppart_team_result"]["teamname"]
+        bottom = map_result["bottompart_team_result"]["teamname"]
+        if not {top, bottom} <= teamnames:
+            return None
+        winner, loser = (
+            (top, bottom) if 2 * sum(rounds) > len(rounds) else (bottom, top)
+        )
+        maps.append((map_result["mapname"], winner, loser))
+        wins[winner] = wins.get(winner, 0) + 1
+    best_of = record.get("best_of") or 1
+    if max(wins.values(), default=0) < best_of // 2 + 1:
+        return None
+    return maps
+
+
+def is_finished(record: dict) -> bool:
+    return get_finished_maps(record) is not None
@@ -0,0 +1,164 @@
+import math
+import os
+from concurrent.futures import ProcessPoolExecutor
+
+import numpy as np
+
+from .features import (
+    HALF_ROUNDS,
+    OVERTIME_ROUNDS,
+    REGULATION_ROUNDS,
+    REGULATION_TARGET,
+)
+from .series import get_map_score, is_played_map
+
+
+def get_target_score(top_score: int, bottom_score: int) -> int:
+    """Returns the score, which wins the map within the current MR12 regulation or MR3 overtime segment.
+
+    If no team reaches the target within the segment, a new overtime starts. A segment has 2 * (target - 1) rounds
+    in total, so both teams can never reach the target within the same segment.
+    """
+    if top_score < HALF_ROUNDS or bottom_score < HALF_ROUNDS:
+        return REGULATION_TARGET
+    overtime = (top_score + bottom_score - REGULATION_ROUNDS) // OVERTIME_ROUNDS
+    return REGULATION_TARGET + (overtime + 1) * (OVERTIME_ROUNDS // 2)
+
+
+def draw_rounds_won(
+    rounds: int, round_probability: float, size: int, rng: np.random.Generator
+) -> np.ndarray:
+    """Draws binomially distributed rounds won by inverting the CDF, which is faster than ``Generator.binomial``."""
+    cdf = np.cumsum(
+        [
+            math.comb(rounds, won)
+            * round_probability**won
+            * (1 - round_probability) ** (rounds - won)
+            for won in range(rounds + 1)
+        ]
+    )
+    return np.searchsorted(cdf[:-1], rng.random(size), side="right")
+
+
+def simulate_maps(
+    top_score: int,
+    bottom_score: int,
+    round_probability: float,
+    simulations: int,
+    rng: np.random.Generator,
+) -> np.ndarray:
+    """Simulates the remaining rounds of a map and returns whether the top team won it in every simulation.
+
+    The rounds won of a whole segment are binomially distributed, so every regulation or overtime segment is drawn
+    at once for all simulations, which are still undecided.
+    """
+    top_won = np.zeros(simulations, dtype=bool)
+    undecided = np.arange(simulations)
+    target = get_target_score(top_score, bottom_score)
+    remaining = 2 * (target - 1) - top_score - bottom_score
+    top = np.full(simulations, top_score)
+    bottom = np.full(simulations, bottom_score)
+    while len(undecided):
+        won = draw_rounds_won(remaining, round_probability, len(undecided), rng)
+        top = top + won
+        bottom = bottom + remaining - won
+        top_won[undecided[top >= target]] = True
+        # The simulations, which were tied after the segment, play the next overtime.
+        tied = (top < target) & (bottom < target)
+        undecided, top, bottom = undecided[tied], top[tied], bottom[tied]
+        target += OVERTIME_ROUNDS // 2
+        remaining = OVERTIME_ROUNDS
+    return top_won
+
+
+def simulate_series(
+    best_of: int,
+    maps_won: tuple[int, int],
+    live_score: tuple[int, int] | None,
+    round_probability: float,
+    simulations: int,
+    seed=None,
+) -> tuple[float, float]:
+    """Returns the probabilities, that the first team wins the live map and the series.
+
+    ``maps_won`` and ``live_score`` are from the perspective of the first team. Without a live map the next map is
+    simulated from 0:0. A decided series is not simulated, but returns its result for both, since the deciding map was
+    always won by the winner of the series.
+    """
+    majority = best_of // 2 + 1
+    if max(maps_won) >= majority or sum(maps_won) >= best_of:
+        won = float(maps_won[0] >= majority)
+        return won, won
+
+    rng = np.random.default_rng(seed)
+    live_score = live_score or (0, 0)
+    live_won = simulate_maps(*live_score, round_probability, simulations, rng)
+    # Like the rounds of a segment, all remaining maps can be played out, since only one team can win the majority.
+    future_maps = max(0, best_of - sum(maps_won) - 1)
+    future_won = simulate_maps(0, 0, round_probability, simulations * future_maps, rng)
+    first = maps_won[0] + live_won + future_won.reshape(simulations, -1).sum(axis=1)
+    return (float(live_won.mean()), float((first >= majority).mean()))
+
+
+def simulate_series_parallel(
+    best_of: int,
+    maps_won: tuple[int, int],
+    live_score: tuple[int, int] | None,
+    round_probability: float,
+    simulations: int,
+    workers: int | None = None,
+    seed=None,
+) -> tuple[float, float]:
+    """Splits the simulations into one batch per worker process with independent random streams."""
+    workers = workers or os.cpu_count() or 1
+    if workers <= 1:
+        return simulate_series(
+            best_of, maps_won, live_score, round_probability, simulations, seed
+        )
+    batch_sizes = [
+        simulations // workers + (index < simulations % workers)
+        for index in range(workers)
+    ]
+    seeds = np.random.SeedSequence(seed).spawn(workers)
+    with ProcessPoolExecutor(workers) as executor:
+        results = list(
+            executor.map(
+                simulate_series,
+                [best_of] * workers,
+                [maps_won] * workers,
+                [live_score] * workers,
+                [round_probability] * workers,
+                batch_sizes,
+                seeds,
+            )
+        )
+    return tuple(
+        sum(result[index] * size for result, size in zip(results, batch_sizes))
+        / simulations
+        for index in range(2)
+    )
+
+
+def get_series_state(record: dict) -> dict:
+    """Returns the maps won of both teams, the live map and whether the series is decided of an assembled match record.
+
+    The first team of the record's ``teams`` is the perspective of all returned scores. The placeholders of unplayed
+    maps are skipped and a decided series has no live map.
+    """
+    teamnames = list(record.get("teams") or dict())
+    first_team = teamnames[0] if teamnames else None
+    maps_won = [0, 0]
+    live_map = None
+    for map_result in filter(is_played_map, record["map_results"]):
+        scores = get_map_score(map_result, first_team)
+        if map_result["source"] == "SCOREBOARD":
+            live_map = {"mapname": map_result["mapname"], "score": scores}
+        else:
+            maps_won[scores[1] > scores[0]] += 1
+    decided = max(maps_won) >= (record.get("best_of") or 1) // 2 + 1
+    return {
+        "teams": teamnames,
+        "maps_won": tuple(maps_won),
+        "live_map": None if decided else live_map,
+        "decided": decided,
+    }
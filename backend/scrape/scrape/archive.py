@@ -0,0 +1,176 @@
+import hashlib
+import sqlite3
+import zlib
+from collections import deque
+from concurrent.futures import FIRST_COMPLETED, ProcessPoolExecutor, wait
+from time import time
+
+from itemadapter import ItemAdapter
+from scrapy import Request
+from scrapy.http import HtmlResponse
+from scrapy.utils.spider import iterate_spider_output
+
+from .items import MatchItem
+from .spiders.match import MatchSpider
+
+
+class PageArchive:
+    """Archive of the raw match and stats pages, so the pages can be parsed again without downloading them.
+
+    Every page body is stored once, compressed and addressed by its SHA-256 digest, and a per-match index maps the
+    URLs of a match to the last archived version of their page. Only the last version is kept, so e.g. polling a live
+    match replaces its former match page instead of adding a body per poll.
+    """
+
+    def __init__(self, path, read_only: bool = False) -> None:
+        if read_only:
+            self._connection = sqlite3.connect(
+                f"file:{path}?mode=ro", uri=True, check_same_thread=False
+            )
+            return
+        self._connection = sqlite3.connect(path, timeout=30, check_same_thread=False)
+        with self._connection:
+            self._connection.executescript("""
+                CREATE TABLE IF NOT EXISTS bodies (
+                    digest TEXT PRIMARY KEY,
+                    body BLOB NOT NULL
+                );
+                CREATE TABLE IF NOT EXISTS pages (
+                    match_id INTEGER NOT NULL,
+                    url TEXT NOT NULL,
+                    digest TEXT NOT NULL REFERENCES bodies (digest),
+                    archived_at REAL NOT NULL,
+                    PRIMARY KEY (match_id, url)
+                );
+                CREATE INDEX IF NOT EXISTS pages_digest ON pages (digest);
+                """)
+
+    def add(self, match_id: int, url: str, body: bytes) -> None:
+        digest = hashlib.sha256(body).hexdigest()
+        with self._connection:
+            row = self._connection.execute(
+                "SELECT digest FROM pages WHERE match_id = ? AND url = ?",
+                (match_id, url),
+            ).fetchone()
+            self._connection.execute(
+                "INSERT OR IGNORE INTO bodies VALUES (?, ?)",
+                (digest, zlib.compress(body)),
+            )
+            # A page, which did not change since it was archived, keeps its index entry.
+            self._connection.execute(
+                "INSERT INTO pages VALUES (?, ?, ?, ?) ON CONFLICT (match_id, url) DO UPDATE "
+                "SET digest = excluded.digest, archived_at = excluded.archived_at "
+                "WHERE digest != excluded.digest",
+                (match_id, url, digest, time()),
+            )
+            # The former version of the page is removed, unless other pages still have the same body.
+            if row is not None and row[0] != digest:
+                self._connection.execute(
+                    "DELETE FROM bodies WHERE digest = ? AND NOT EXISTS "
+                    "(SELECT 1 FROM pages WHERE digest = ?)",
+                    (row[0], row[0]),
+                )
+
+    def get_pages(self, match_id: int) -> dict[str, bytes]:
+        rows = self._connection.execute(
+            "SELECT url, body FROM pages JOIN bodies USING (digest) WHERE match_id = ? "
+            "ORDER BY archived_at DESC",
+            (match_id,),
+        )
+        return {url: zlib.decompress(body) for url, body in rows}
+
+    def iter_match_ids(self):
+        for (match_id,) in self._connection.execute(
+            "SELECT DISTINCT match_id FROM pages ORDER BY match_id"
+        ):
+            yield match_id
+
+    def close(self) -> None:
+        self._connection.close()
+
+
+def parse_archived_match(
+    archive: PageArchive, match_id: int, spider: MatchSpider | None = None
+) -> list[dict]:
+    """Runs the current parse callbacks of the match spider over the archived pages of a match.
+
+    The parse starts at the last archived match page and the requests yielded by the callbacks are answered from the
+    archive, so no page is downloaded. Pages, which were never archived, are skipped like a failed download.
+    """
+    spider = spider or MatchSpider()
+    pages = archive.get_pages(match_id)
+    match_urls = [url for url in pages if "/matches/" in url and "/stats/" not in url]
+    if not match_urls:
+        return list()
+
+    items = list()
+    # The requests are answered in the order, in which they were yielded, so the map results keep the order of the maps.
+    pending = deque([(Request(match_urls[0], callback=spider.parse), match_urls[0])])
+    while pending:
+        request, url = pending.popleft()
+        response = HtmlResponse(
+            url=url, body=pages[url], encoding="utf-8", request=request
+        )
+        output = request.callback(response, **request.cb_kwargs)
+        for result in iterate_spider_output(output):
+            if isinstance(result, Request):
+                if result.url in pages:
+                    pending.append((result, result.url))
+            else:
+                items.append(result)
+    return items
+
+
+_worker_archive: PageArchive | None = None
+
+
+def _init_worker(archive_path) -> None:
+    global _worker_archive
+    _worker_archive = PageArchive(archive_path, read_only=True)
+
+
+def _reparse_matches(match_ids: list[int]) -> list[tuple[int, dict | None, str | None]]:
+    """Returns the re-parsed record (``None`` without pages) and the error of every match.
+
+    A page, which the current spider cannot parse (e.g. a truncated one), only fails its own match.
+    """
+    spider = MatchSpider()
+    results = list()
+    for match_id in match_ids:
+        try:
+            items = parse_archived_match(_worker_archive, match_id, spider)
+            record = (
+                ItemAdapter(MatchItem.from_fragments(items)).asdict() if items else None
+            )
+        except Exception as error:
+            results.append((match_id, None, f"{type(error).__name__}: {error}"))
+        else:
+            results.append((match_id, record, None))
+    return results
+
+
+def reparse_archive(archive_path, match_ids, workers: int, chunk_size: int = 16):
+    """Yields the id, the re-parsed record and the parse error of every given match as soon as it is ready, parsed by
+    a pool of processes.
+
+    The record is ``None``, if the match has no archived match page or could not be parsed. Only a small window of
+    chunks is submitted at once, so the records are streamed instead of collected.
+    """
+    match_ids = iter(match_ids)
+    with ProcessPoolExecutor(
+        workers, initializer=_init_worker, initargs=(str(archive_path),)
+    ) as executor:
+        futures = set()
+
+        def submit_next() -> None:
+            chunk = [match_id for _, match_id in zip(range(chunk_size), match_ids)]
+            if chunk:
+                futures.add(executor.submit(_reparse_matches, chunk))
+
+        for _ in range(2 * workers):
+            submit_next()
+        while futures:
+            done, futures = wait(futures, return_when=FIRST_COMPLETED)
+            for future in done:
+                yield from future.result()
+                submit_next()
@@ -0,0 +1,114 @@
+"""Compact encoding of the map results, which the match store and the result cache keep instead of the round lists.
+
+The round outcomes (True = round won) of every half and overtime are packed into the hex digits of one integer: Bit i
+holds round i and an additional leading 1-bit marks the number of rounds, e.g. [True, False, False] -> "9". A map
+result becomes a list of its source, map name and both team results, which are lists of their team name, score and
+packed rounds. Records and fragments, whose map results are still dicts, are read as they are.
+"""
+
+from functools import lru_cache
+
+from .spiders.metadata import RoundHistorySource
+
+
+def pack_rounds(rounds: list[bool] | None) -> str | None:
+    if rounds is None:
+        return None
+    packed = 1 << len(rounds)
+    for index, won in enumerate(rounds):
+        if won:
+            packed |= 1 << index
+    return format(packed, "x")
+
+
+@lru_cache(maxsize=1 << 16)
+def _unpack_rounds(packed: str) -> tuple[bool, ...]:
+    # The binary digits without the "0b" prefix and the leading 1-bit, whose last digit is the first round.
+    return tuple(digit == "1" for digit in reversed(bin(int(packed, 16))[3:]))
+
+
+def unpack_rounds(packed: str | None) -> list[bool] | None:
+    # The halves repeat a lot across maps, so they are unpacked once and copied into a list of their own.
+    return None if packed is None else list(_unpack_rounds(packed))
+
+
+def pack_team_result(team_result: dict) -> list:
+    overtime = team_result["overtime"]
+    return [
+        team_result["teamname"],
+        team_result["score"],
+        pack_rounds(team_result["firsthalf"]),
+        pack_rounds(team_result["secondhalf"]),
+        None if overtime is None else [pack_rounds(rounds) for rounds in overtime],
+    ]
+
+
+def unpack_team_result(packed: list) -> dict:
+    teamname, score, firsthalf, secondhalf, overtime = packed
+    return {
+        "teamname": teamname,
+        "score": score,
+        "firsthalf": unpack_rounds(firsthalf),
+        "secondhalf": unpack_rounds(secondhalf),
+        "overtime": (
+            None if overtime is None else [unpack_rounds(rounds) for rounds in overtime]
+        ),
+    }
+
+
+def pack_map_result(map_result: dict) -> list:
+    return [
+        RoundHistorySource[map_result["source"]].value,
+        map_result["mapname"],
+        pack_team_result(map_result["toppart_team_result"]),
+        pack_team_result(map_result["bottompart_team_result"]),
+    ]
+
+
+def unpack_map_result(packed: list | dict) -> dict:
+    if isinstance(packed, dict):
+        return packed
+    source, mapname, toppart_team_result, bottompart_team_result = packed
+    return {
+        "source": RoundHistorySource(source).name,
+        "mapname": mapname,
+        "toppart_team_result": unpack_team_result(toppart_team_result),
+        "bottompart_team_result": unpack_team_result(bottompart_team_result),
+    }
+
+
+def pack_record(record: dict) -> dict:
+    if "map_results" not in record:
+        return record
+    return {
+        **record,
+        "map_results": [
+            pack_map_result(map_result) for map_result in record["map_results"]
+        ],
+    }
+
+
+def unpack_record(record: dict) -> dict:
+    if "map_results" in record:
+        record["map_results"] = [
+            unpack_map_result(map_result) for map_result in record["map_results"]
+        ]
+    return record
+
+
+def pack_fragments(items: list[dict]) -> list[dict]:
+    return [
+        (
+            {**item, "map_result": pack_map_result(item["map_result"])}
+            if "map_result" in item
+            else item
+        )
+        for item in items
+    ]
+
+
+def unpack_fragments(items: list[dict]) -> list[dict]:
+    for item in items:
+        if "map_result" in item:
+            item["map_result"] = unpack_map_result(item["map_result"])
+    return items
@@ -0,0 +1,169 @@
+# Define here the HTTP cache policy and storage of the HLTV pages
+#
+# See documentation in:
+# https://docs.scrapy.org/en/latest/topics/downloader-middleware.html#module-scrapy.downloadermiddlewares.httpcache
+
+import hashlib
+import os
+import re
+import sqlite3
+import zlib
+from pathlib import Path
+from time import time
+
+from scrapy.extensions.httpcache import RFC2616Policy, rfc1123_to_epoch
+from scrapy.http import Headers
+from scrapy.responsetypes import responsetypes
+from scrapy.utils.project import data_path
+from w3lib.http import headers_dict_to_raw, headers_raw_to_dict
+
+
+class HltvCachePolicy(RFC2616Policy):
+    """RFC2616 policy, where the freshness of known HLTV pages is decided by their URL instead of their headers.
+
+    ``HTTPCACHE_MAX_AGE_BY_URL`` maps URL regexes to a max-age in seconds, where ``None`` marks the page as immutable
+    (e.g. the stats page of a finished map). Stale pages are revalidated with ETag/Last-Modified, if available.
+    """
+
+    def __init__(self, settings):
+        super().__init__(settings)
+        self.max_age_by_url = [
+            (re.compile(pattern), max_age)
+            for pattern, max_age in settings.getdict("HTTPCACHE_MAX_AGE_BY_URL").items()
+        ]
+
+    def _match_url(self, url: str) -> tuple[bool, int | None]:
+        for pattern, max_age in self.max_age_by_url:
+            if pattern.search(url):
+                return (True, max_age)
+        return (False, None)
+
+    def should_cache_response(self, response, request) -> bool:
+        is_known, _ = self._match_url(request.url)
+        if is_known:
+            return response.status == 200
+        return super().should_cache_response(response, request)
+
+    def is_cached_response_fresh(self, cachedresponse, request) -> bool:
+        is_known, max_age = self._match_url(request.url)
+        if not is_known:
+            return super().is_cached_response_fresh(cachedresponse, request)
+        if max_age is None:
+            return True
+        current_age = self._compute_cached_age(cachedresponse, request, time())
+        if current_age is not None and current_age < max_age:
+            return True
+        self._set_conditional_validators(request, cachedresponse)
+        return False
+
+    def _compute_cached_age(self, cachedresponse, request, now) -> float | None:
+        """Returns the age of the cached response, or ``None`` if it is unknown (i.e. the response is stale).
+
+        Without a (valid) Date header, the RFC2616 policy takes the response as just generated, so its age is taken from
+        the time it was stored in the cache instead (see ``cache_timestamp``).
+        """
+        if rfc1123_to_epoch(cachedresponse.headers.get(b"Date")) is not None:
+            return self._compute_current_age(cachedresponse, request, now)
+        timestamp = request.meta.get("cache_timestamp")
+        return None if timestamp is None else max(0, now - timestamp)
+
+
+class ContentAddressedCacheStorage:
+    """Stores every response body once, compressed and addressed by its SHA-256 digest.
+
+    A SQLite index maps the request fingerprints to the status, headers and body digest of their cached response, so
+    pages with the same content (e.g. after a revalidation) share their body on disk. A body is removed, once no page
+    refers to it anymore.
+    """
+
+    def __init__(self, settings):
+        self.cachedir = Path(data_path(settings["HTTPCACHE_DIR"], createdir=True))
+        self.expiration_secs = settings.getint("HTTPCACHE_EXPIRATION_SECS")
+        self._connection = None
+
+    def open_spider(self, spider) -> None:
+        self._fingerprinter = spider.crawler.request_fingerprinter
+        self._connection = sqlite3.connect(self.cachedir / "index.sqlite3", timeout=30)
+        with self._connection:
+            self._connection.execute(
+                "CREATE TABLE IF NOT EXISTS responses ("
+                "fingerprint TEXT PRIMARY KEY, url TEXT NOT NULL, status INTEGER NOT NULL, "
+                "headers BLOB NOT NULL, digest TEXT NOT NULL, timestamp REAL NOT NULL)"
+            )
+            self._connection.execute(
+                "CREATE INDEX IF NOT EXISTS responses_digest ON responses (digest)"
+            )
+
+    def close_spider(self, spider) -> None:
+        self._connection.close()
+        # Report the share of cache lookups, which were answered without downloading the page (again).
+        stats = spider.crawler.stats
+        hits = stats.get_value("httpcache/hit", 0) + stats.get_value(
+            "httpcache/revalidate", 0
+        )
+        lookups = (
+            hits
+            + stats.get_value("httpcache/miss", 0)
+            + stats.get_value("httpcache/invalidate", 0)
+        )
+        if lookups:
+            stats.set_value("httpcache/hit_rate", round(hits / lookups, 4))
+
+    def retrieve_response(self, spider, request):
+        row = self._connection.execute(
+            "SELECT url, status, headers, digest, timestamp FROM responses WHERE fingerprint = ?",
+            (self._fingerprinter.fingerprint(request).hex(),),
+        ).fetchone()
+        if row is None:
+            return None
+        url, status, raw_headers, digest, timestamp = row
+        if 0 < self.expiration_secs < time() - timestamp:
+            return None
+        try:
+            body = zlib.decompress(self._get_blob_path(digest).read_bytes())
+        except FileNotFoundError:
+            return None
+
+        headers = Headers(headers_raw_to_dict(raw_headers))
+        respcls = responsetypes.from_args(headers=headers, url=url, body=body)
+        request.meta["cache_timestamp"] = timestamp
+        return respcls(url=url, headers=headers, status=status, body=body)
+
+    def store_response(self, spider, request, response) -> None:
+        digest = hashlib.sha256(response.body).hexdigest()
+        blob_path = self._get_blob_path(digest)
+        if not blob_path.exists():
+            blob_path.parent.mkdir(parents=True, exist_ok=True)
+            temporary_path = blob_path.with_suffix(f".{os.getpid()}.tmp")
+            temporary_path.write_bytes(zlib.compress(response.body))
+            temporary_path.replace(blob_path)
+        fingerprint = self._fingerprinter.fingerprint(request).hex()
+        with self._connection:
+            row = self._connection.execute(
+                "SELECT digest FROM responses WHERE fingerprint = ?", (fingerprint,)
+            ).fetchone()
+            self._connection.execute(
+                "INSERT OR REPLACE INTO responses VALUES (?, ?, ?, ?, ?, ?)",
+                (
+                    fingerprint,
+                    response.url,
+                    response.status,
+                    headers_dict_to_raw(response.headers),
+                    digest,
+                    time(),
+                ),
+            )
+            # The former body of the page is removed, unless other pages still have the same content.
+            orphaned_digest = None
+            if row is not None and row[0] != digest:
+                is_referenced = self._connection.execute(
+                    "SELECT 1 FROM responses WHERE digest = ? LIMIT 1", (row[0],)
+                ).fetchone()
+                if is_referenced is None:
+                    orphaned_digest = row[0]
+        # Another process storing the same body right now may lose it, which only turns its next lookup into a miss.
+        if orphaned_digest is not None:
+            self._get_blob_path(orphaned_digest).unlink(missing_ok=True)
+
+    def _get_blob_path(self, digest: str) -> Path:
+        return self.cachedir / "blobs" / digest[:2] / f"{digest}.z"
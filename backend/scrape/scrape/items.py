@@ -6,7 +6,28 @@
 import scrapy
 
 
-class ScrapeItem(scrapy.Item):
-    # define the fields for your item here like:
-    # name = scrapy.Field()
-    pass
+class MatchItem(scrapy.Item):
+    """One match record, assembled from the fragments yielded by the match spider."""
+
+    match_id = scrapy.Field()
+    event = scrapy.Field()
+    teams = scrapy.Field()
+    best_of = scrapy.Field()
+    map_results = scrapy.Field()
+
+    def add_fragment(self, fragment: dict) -> None:
+        for key, value in fragment.items():
+            if key == "map_result":
+                self.setdefault("map_results", list()).append(value)
+            elif key == "best-of":
+                self["best_of"] = value
+            else:
+                self[key] = value
+
+    @classmethod
+    def from_fragments(cls, fragments):
+        item = cls()
+        for fragment in fragments:
+            item.add_fragment(fragment)
+        item.setdefault("map_results", list())
+        return item
@@ -3,11 +3,29 @@
 # See documentation in:
 # https://docs.scrapy.org/en/latest/topics/spider-middleware.html
 
+import asyncio
+import random
+import re
+import sqlite3
+from email.utils import parsedate_to_datetime
+from pathlib import Path
+from time import perf_counter, time
+from urllib.parse import urlparse
+
 from scrapy import signals
+from scrapy.downloadermiddlewares.retry import get_retry_request
+from scrapy.exceptions import NotConfigured
+from scrapy.utils.project import data_path
 
 # useful for handling different item types with a single interface
 from itemadapter import is_item, ItemAdapter
 
+from .archive import PageArchive
+from .spiders.metadata import parse_match_id
+
+MATCH_PAGE_PATTERN = re.compile(r"^/matches/\d+/")
+STATS_PAGE_PATTERN = re.compile(r"^/stats/matches/")
+
 
 class ScrapeSpiderMiddleware:
     # Not all methods need to be defined. If a method is not defined,
@@ -101,3 +119,309 @@ class ScrapeDownloaderMiddleware:
 
     def spider_opened(self, spider):
         spider.logger.info("Spider opened: %s" % spider.name)
+
+
+class PageArchiveMiddleware:
+    """Archives every downloaded match and stats page, so the current parse callbacks can be rerun over them later.
+
+    Responses answered from the HTTP cache are archived as well, since e.g. a cached stats page may belong to a match,
+    which was not archived yet. Listing pages are not archived.
+    """
+
+    def __init__(self, archive_path) -> None:
+        self.archive_path = archive_path
+        self.archive = None
+
+    @classmethod
+    def from_crawler(cls, crawler):
+        if not crawler.settings.getbool("PAGE_ARCHIVE_ENABLED"):
+            raise NotConfigured
+        middleware = cls(data_path(crawler.settings["PAGE_ARCHIVE_PATH"]))
+        crawler.signals.connect(middleware.spider_opened, signal=signals.spider_opened)
+        crawler.signals.connect(middleware.spider_closed, signal=signals.spider_closed)
+        return middleware
+
+    def spider_opened(self, spider):
+        Path(self.archive_path).parent.mkdir(parents=True, exist_ok=True)
+        self.archive = PageArchive(self.archive_path)
+
+    def spider_closed(self, spider):
+        self.archive.close()
+
+    def process_response(self, request, response, spider):
+        if response.status != 200:
+            return response
+        match_id = request.cb_kwargs.get("match_id")
+        if match_id is None and MATCH_PAGE_PATTERN.search(urlparse(response.url).path):
+            match_id = parse_match_id(response.url)
+        if match_id is not None:
+            self.archive.add(match_id, response.url, response.body)
+            spider.crawler.stats.inc_value("archive/pages")
+        return response
+
+
+# Sent with the callback name and the seconds spent in it, whenever a spider callback finished.
+parse_timed = object()
+
+
+class ParseTimingMiddleware:
+    """Measures the time spent in the spider callbacks, i.e. the selector parsing, and sends it as a signal."""
+
+    def __init__(self, crawler) -> None:
+        self.crawler = crawler
+
+    @classmethod
+    def from_crawler(cls, crawler):
+        return cls(crawler)
+
+    def _send(self, response, seconds: float) -> None:
+        callback = response.request.callback if response.request else None
+        self.crawler.signals.send_catch_log(
+            signal=parse_timed,
+            callback=getattr(callback, "__name__", "parse"),
+            seconds=seconds,
+        )
+
+    def process_spider_output(self, response, result, spider):
+        seconds = 0.0
+        iterator = iter(result)
+        while True:
+            start = perf_counter()
+            try:
+                output = next(iterator)
+            except StopIteration:
+                break
+            finally:
+                seconds += perf_counter() - start
+            yield output
+        self._send(response, seconds)
+
+    async def process_spider_output_async(self, response, result, spider):
+        seconds = 0.0
+        iterator = aiter(result)
+        while True:
+            start = perf_counter()
+            try:
+                output = await anext(iterator)
+            except StopAsyncIteration:
+                break
+            finally:
+                seconds += perf_counter() - start
+            yield output
+        self._send(response, seconds)
+
+
+# Tokens, which a request of the priority leaves in the bucket for the higher priorities, so e.g. a backfill never
+# takes the last tokens, which a live match request would otherwise get right away.
+PRIORITY_RESERVES = {"live": 0, "stats": 1, "backfill": 2}
+
+
+class SharedTokenBucket:
+    """Token bucket per host, which is shared by all crawl processes through a local SQLite database.
+
+    The rate adapts AIMD-like: It is halved and the bucket is emptied for a backoff, whenever the host answers with
+    429/503, and every successful response increases it again by a fraction of the configured rate.
+    """
+
+    def __init__(
+        self,
+        path,
+        rate: float,
+        burst: float,
+        min_rate: float,
+        backoff: float,
+        max_backoff: float,
+    ) -> None:
+        self.rate = rate
+        self.burst = burst
+        self.min_rate = min_rate
+        self.backoff = backoff
+        self.max_backoff = max_backoff
+        # Transactions are started explicitly, so every read-modify-write holds the database lock throughout.
+        self._connection = sqlite3.connect(
+            path, timeout=30, isolation_level=None, check_same_thread=False
+        )
+        self._connection.execute("""
+            CREATE TABLE IF NOT EXISTS buckets (
+                host TEXT PRIMARY KEY,
+                tokens REAL NOT NULL,
+                updated_at REAL NOT NULL,
+                rate REAL NOT NULL,
+                failures INTEGER NOT NULL
+            )
+            """)
+
+    def _read(self, host: str, now: float) -> tuple[float, float, float, int]:
+        row = self._connection.execute(
+            "SELECT tokens, updated_at, rate, failures FROM buckets WHERE host = ?",
+            (host,),
+        ).fetchone()
+        if row is None:
+            return self.burst, now, self.rate, 0
+        tokens, updated_at, rate, failures = row
+        # A backed off bucket has its update time in the future and does not refill until then.
+        tokens = min(self.burst, tokens + max(0.0, now - updated_at) * rate)
+        return tokens, max(now, updated_at), rate, failures
+
+    def _write(self, host: str, tokens, updated_at, rate, failures) -> None:
+        self._connection.execute(
+            "INSERT OR REPLACE INTO buckets VALUES (?, ?, ?, ?, ?)",
+            (host, tokens, updated_at, rate, failures),
+        )
+
+    def acquire(self, host: str, reserve: float = 0) -> float:
+        """Takes a token and returns 0 or returns the seconds to wait, until a token can be taken."""
+        now = time()
+        with self._connection:
+            self._connection.execute("BEGIN IMMEDIATE")
+            tokens, updated_at, rate, failures = self._read(host, now)
+            wait = updated_at - now
+            if wait <= 0 and tokens >= 1 + reserve:
+                tokens -= 1
+            else:
+                wait = max(wait, 0) + (1 + reserve - tokens) / rate
+            self._write(host, tokens, updated_at, rate, failures)
+        return max(wait, 0)
+
+    def back_off(self, host: str, retry_after: float | None = None) -> float:
+        """Halves the rate and blocks the bucket for ``retry_after`` or an exponential backoff and returns the latter."""
+        now = time()
+        with self._connection:
+            self._connection.execute("BEGIN IMMEDIATE")
+            _, updated_at, rate, failures = self._read(host, now)
+            if retry_after is None:
+                retry_after = min(self.max_backoff, self.backoff * 2**failures)
+            self._write(
+                host,
+                0.0,
+                max(updated_at, now + retry_after),
+                max(self.min_rate, rate / 2),
+                failures + 1,
+            )
+        return retry_after
+
+    def recover(self, host: str) -> None:
+        with self._connection:
+            self._connection.execute(
+                "UPDATE buckets SET rate = MIN(?, rate + ?), failures = 0 "
+                "WHERE host = ? AND (rate < ? OR failures > 0)",
+                (self.rate, self.rate / 20, host, self.rate),
+            )
+
+    def close(self) -> None:
+        self._connection.close()
+
+
+def get_retry_after(response) -> float | None:
+    value = response.headers.get("Retry-After")
+    if value is None:
+        return None
+    value = value.decode("latin-1").strip()
+    try:
+        return max(0.0, float(value))
+    except ValueError:
+        pass
+    try:
+        return max(0.0, parsedate_to_datetime(value).timestamp() - time())
+    except (TypeError, ValueError):
+        return None
+
+
+class TokenBucketMiddleware:
+    """Paces the downloads of all crawl processes together by a shared token bucket per host.
+
+    Requests are classified as live, stats or backfill, either by their ``crawl_priority`` meta key or by the
+    ``crawl_priority`` attribute of the spider (e.g. ``-a crawl_priority=backfill``) and their URL. Lower priorities
+    leave a reserve of tokens to the higher ones. Responses with 429/503 back the bucket off for all processes and are
+    retried after a jittered exponential delay.
+
+    It is placed after the HTTP cache, so cached responses never take a token.
+    """
+
+    def __init__(self, crawler, bucket_path) -> None:
+        self.crawler = crawler
+        self.bucket_path = bucket_path
+        self.bucket = None
+        settings = crawler.settings
+        self.retry_times = settings.getint("TOKEN_BUCKET_RETRY_TIMES")
+        self.retry_http_codes = set(settings.getlist("TOKEN_BUCKET_RETRY_HTTP_CODES"))
+
+    @classmethod
+    def from_crawler(cls, crawler):
+        if not crawler.settings.getbool("TOKEN_BUCKET_ENABLED"):
+            raise NotConfigured
+        middleware = cls(crawler, data_path(crawler.settings["TOKEN_BUCKET_PATH"]))
+        crawler.signals.connect(middleware.spider_opened, signal=signals.spider_opened)
+        crawler.signals.connect(middleware.spider_closed, signal=signals.spider_closed)
+        return middleware
+
+    def spider_opened(self, spider):
+        settings = self.crawler.settings
+        Path(self.bucket_path).parent.mkdir(parents=True, exist_ok=True)
+        self.bucket = SharedTokenBucket(
+            self.bucket_path,
+            rate=settings.getfloat("TOKEN_BUCKET_RATE"),
+            burst=settings.getfloat("TOKEN_BUCKET_BURST"),
+            min_rate=settings.getfloat("TOKEN_BUCKET_MIN_RATE"),
+            backoff=settings.getfloat("TOKEN_BUCKET_BACKOFF"),
+            max_backoff=settings.getfloat("TOKEN_BUCKET_MAX_BACKOFF"),
+        )
+
+    def spider_closed(self, spider):
+        self.bucket.close()
+
+    def get_priority(self, request, spider) -> str:
+        priority = request.meta.get("crawl_priority")
+        if priority is None:
+            priority = getattr(spider, "crawl_priority", "live")
+            if priority == "live" and STATS_PAGE_PATTERN.match(
+                urlparse(request.url).path
+            ):
+                priority = "stats"
+        return priority
+
+    async def process_request(self, request, spider):
+        stats = self.crawler.stats
+        waited = request.meta.get("token_bucket_delay", 0.0)
+        if waited:
+            await asyncio.sleep(waited)
+        host = urlparse(request.url).hostname
+        reserve = PRIORITY_RESERVES[self.get_priority(request, spider)]
+        while True:
+            wait = self.bucket.acquire(host, reserve)
+            if not wait:
+                break
+            # The jitter keeps the waiting requests of all processes from polling the bucket in lockstep.
+            wait = min(wait, 5.0) * random.uniform(1.0, 1.2)
+            waited += wait
+            await asyncio.sleep(wait)
+        if waited:
+            stats.inc_value("tokenbucket/delayed")
+            stats.inc_value("tokenbucket/wait_seconds", waited)
+        return None
+
+    def process_response(self, request, response, spider):
+        if "cached" in response.flags:
+            return response
+        host = urlparse(request.url).hostname
+        if response.status not in self.retry_http_codes:
+            self.bucket.recover(host)
+            return response
+
+        backoff = self.bucket.back_off(host, get_retry_after(response))
+        self.crawler.stats.inc_value("tokenbucket/backoff")
+        retry_request = get_retry_request(
+            request,
+            spider=spider,
+            reason=f"status {response.status}",
+            max_retry_times=self.retry_times,
+            stats_base_key="tokenbucket/retry",
+        )
+        if retry_request is None:
+            return response
+        # Full jitter, so the retries of all processes do not hit the host at once, when the backoff ends.
+        retries = retry_request.meta["retry_times"]
+        retry_request.meta["token_bucket_delay"] = random.uniform(
+            0, min(self.bucket.max_backoff, backoff * 2 ** (retries - 1))
+        )
+        return retry_request
@@ -4,10 +4,63 @@
 # See: https://docs.scrapy.org/en/latest/topics/item-pipeline.html
 
 
+from pathlib import Path
+
 # useful for handling different item types with a single interface
 from itemadapter import ItemAdapter
+from scrapy.utils.project import data_path
+
+from .items import MatchItem
+from .store import MatchStore
+
+# Sent with the ``match_id`` of every record, once it was written to the match store.
+record_stored = object()
 
 
 class ScrapePipeline:
     def process_item(self, item, spider):
         return item
+
+
+class MatchRecordPipeline:
+    """Collects the fragments of every match into one ``MatchItem`` and stores the records in the match store.
+
+    The fragments themselves are passed on unchanged, so feed exports and the crawl engine still receive them. The
+    ``record_stored`` signal is sent for every stored record, e.g. for the discovery spider to advance its watermark.
+    """
+
+    def __init__(self, store_path: str, batch_size: int, signals=None) -> None:
+        self.store_path = store_path
+        self.batch_size = batch_size
+        self.signals = signals
+        self.records: dict[int, MatchItem] = dict()
+
+    @classmethod
+    def from_crawler(cls, crawler):
+        return cls(
+            store_path=data_path(crawler.settings["MATCH_STORE_PATH"]),
+            batch_size=crawler.settings.getint("MATCH_STORE_BATCH_SIZE"),
+            signals=crawler.signals,
+        )
+
+    def open_spider(self, spider):
+        Path(self.store_path).parent.mkdir(parents=True, exist_ok=True)
+        self.store = MatchStore(self.store_path, self.batch_size)
+
+    def close_spider(self, spider):
+        # Only now all fragments of the matches were scraped, i.e. also the ones of the map stats pages.
+        for record in self.records.values():
+            self.store.add(ItemAdapter(record).asdict())
+        self.store.close()
+        if self.signals is not None:
+            for match_id in self.records:
+                self.signals.send_catch_log(
+                    signal=record_stored, match_id=match_id, spider=spider
+                )
+        self.records.clear()
+
+    def process_item(self, item, spider):
+        match_id = ItemAdapter(item).get("match_id")
+        if match_id is not None:
+            self.records.setdefault(match_id, MatchItem()).add_fragment(item)
+        return item
@@ -21,7 +21,8 @@ ROBOTSTXT_OBEY = True
 # Configure a delay for requests for the same website (default: 0)
 # See https://docs.scrapy.org/en/latest/topics/settings.html#download-delay
 # See also autothrottle settings and docs
-DOWNLOAD_DELAY = 3
+# The downloads are paced by the TokenBucketMiddleware across all crawl processes instead (see TOKEN_BUCKET_RATE).
+DOWNLOAD_DELAY = 0
 # The download delay setting will honor only one of:
 # CONCURRENT_REQUESTS_PER_DOMAIN = 16
 # CONCURRENT_REQUESTS_PER_IP = 16
@@ -40,9 +41,10 @@ COOKIES_ENABLED = False
 
 # Enable or disable spider middlewares
 # See https://docs.scrapy.org/en/latest/topics/spider-middleware.html
-# SPIDER_MIDDLEWARES = {
-#    "scrape.middlewares.ScrapeSpiderMiddleware": 543,
-# }
+SPIDER_MIDDLEWARES = {
+    #    "scrape.middlewares.ScrapeSpiderMiddleware": 543,
+    "scrape.middlewares.ParseTimingMiddleware": 950,
+}
 
 # Enable or disable downloader middlewares
 # See https://docs.scrapy.org/en/latest/topics/downloader-middleware.html
@@ -51,7 +53,12 @@ DOWNLOADER_MIDDLEWARES = {
     "scrapy.downloadermiddlewares.retry.RetryMiddleware": None,
     "scrapy_fake_useragent.middleware.RandomUserAgentMiddleware": 400,
     "scrapy_fake_useragent.middleware.RetryUserAgentMiddleware": 401,
+    "scrape.middlewares.PageArchiveMiddleware": 950,
+    "scrape.middlewares.TokenBucketMiddleware": 960,
 }
+# The RetryUserAgentMiddleware replaces the built-in RetryMiddleware and retries these codes with another user agent.
+# 429 and 503 are left out, since the TokenBucketMiddleware retries them with a backoff shared by all processes.
+RETRY_HTTP_CODES = [500, 502, 504, 522, 524, 408]
 
 FAKEUSERAGENT_PROVIDERS = [
     "scrapy_fake_useragent.providers.FakeUserAgentProvider",  # this is the first provider we'll try
@@ -70,9 +77,9 @@ USER_AGENT = "scrape (+http://www.google.com)"
 
 # Configure item pipelines
 # See https://docs.scrapy.org/en/latest/topics/item-pipeline.html
-# ITEM_PIPELINES = {
-#    "scrape.pipelines.ScrapePipeline": 300,
-# }
+ITEM_PIPELINES = {
+    "scrape.pipelines.MatchRecordPipeline": 300,
+}
 
 # Enable and configure the AutoThrottle extension (disabled by default)
 # See https://docs.scrapy.org/en/latest/topics/autothrottle.html
@@ -89,11 +96,11 @@ USER_AGENT = "scrape (+http://www.google.com)"
 
 # Enable and configure HTTP caching (disabled by default)
 # See https://docs.scrapy.org/en/latest/topics/downloader-middleware.html#httpcache-middleware-settings
-# HTTPCACHE_ENABLED = True
-# HTTPCACHE_EXPIRATION_SECS = 0
-# HTTPCACHE_DIR = "httpcache"
-# HTTPCACHE_IGNORE_HTTP_CODES = []
-# HTTPCACHE_STORAGE = "scrapy.extensions.httpcache.FilesystemCacheStorage"
+HTTPCACHE_ENABLED = True
+HTTPCACHE_EXPIRATION_SECS = 0
+HTTPCACHE_DIR = "httpcache"
+HTTPCACHE_POLICY = "scrape.httpcache.HltvCachePolicy"
+HTTPCACHE_STORAGE = "scrape.httpcache.ContentAddressedCacheStorage"
 
 # Set settings whose default value is deprecated to a future-proof value
 REQUEST_FINGERPRINTER_IMPLEMENTATION = "2.7"
@@ -102,3 +109,41 @@ FEED_EXPORT_ENCODING = "utf-8"
 
 # Custom settings of the scrape-project:
 SPIDER_ALLOWED_DOMAINS = ["hltv.org"]
+# SQLite store of the assembled match records and how many records are written per transaction.
+MATCH_STORE_PATH = "matches.sqlite3"
+MATCH_STORE_BATCH_SIZE = 100
+# Max-age in seconds of the cached pages by their URL regex, where None means the page never changes.
+HTTPCACHE_MAX_AGE_BY_URL = {
+    r"/stats/matches/": None,  # stats pages of finished maps
+    r"/matches/\d+": 15,  # match pages, which change while the match is live
+    r"/robots\.txt$": 24 * 3600,
+    r"/(results|matches)/?(\?|$)": 60,  # listings of the discovery spider
+}
+
+# Archive of the raw match and stats pages, which can be re-parsed without network access (see "flask reparse").
+PAGE_ARCHIVE_ENABLED = True
+PAGE_ARCHIVE_PATH = "archive.sqlite3"
+
+# Listings walked by the discovery spider, i.e. the results (newest first) and the upcoming matches.
+DISCOVERY_START_URLS = ["https://www.hltv.org/results", "https://www.hltv.org/matches"]
+DISCOVERY_WATERMARK_PATH = "discovery_watermark.json"
+# Listing pages walked at most per discovery run, e.g. for the very first run without a watermark.
+DISCOVERY_MAX_PAGES = 5
+# Later runs crawl the discovered matches again, whose records were not stored, at most this many times.
+DISCOVERY_RETRY_TIMES = 3
+
+# Token bucket per host, which all crawl processes of the project take their downloads from.
+TOKEN_BUCKET_ENABLED = True
+TOKEN_BUCKET_PATH = "token_bucket.sqlite3"
+# Sustained downloads per second of all processes together, i.e. the former DOWNLOAD_DELAY of 3 seconds, and how many
+# can be downloaded at once after a pause. The burst has to exceed the largest reserve of the priorities (backfill: 2),
+# otherwise the lower priorities never get a token.
+TOKEN_BUCKET_RATE = 1 / 3
+TOKEN_BUCKET_BURST = 4
+# The rate is halved down to TOKEN_BUCKET_MIN_RATE on every 429/503, which blocks the bucket for its Retry-After or
+# for TOKEN_BUCKET_BACKOFF seconds, doubled on every consecutive block up to TOKEN_BUCKET_MAX_BACKOFF.
+TOKEN_BUCKET_MIN_RATE = 0.05
+TOKEN_BUCKET_BACKOFF = 10
+TOKEN_BUCKET_MAX_BACKOFF = 300
+TOKEN_BUCKET_RETRY_TIMES = 5
+TOKEN_BUCKET_RETRY_HTTP_CODES = [429, 503]
@@ -0,0 +1,190 @@
+import json
+import os
+import re
+from pathlib import Path
+from urllib.parse import urljoin, urlparse
+
+import scrapy
+from scrapy import signals
+from scrapy.utils.project import data_path
+
+from .. import pipelines
+from .match import MatchSpider
+from .metadata import DISCOVERY_SPIDER_NAME, parse_match_id
+
+MATCH_PATH_PATTERN = re.compile(r"^/matches/\d+/")
+
+
+class Watermark:
+    """The newest result and the highest upcoming match id seen by previous discovery runs, persisted as JSON.
+
+    Results are listed newest first, so a run stops at the first result, which is not newer than the watermark. The
+    ids of the results at exactly the watermark time are kept as well, so results finished at the same time as the
+    watermark are neither skipped nor crawled twice. Discovered matches, whose records were not stored, are kept with
+    their remaining retries, since the watermark is already past them.
+    """
+
+    def __init__(self, path) -> None:
+        self.path = Path(path)
+        self.result_unix: int | None = None
+        self.result_ids: set[int] = set()
+        self.upcoming_id: int | None = None
+        self.retries: dict[int, int] = dict()
+        if self.path.exists():
+            state = json.loads(self.path.read_text(encoding="utf-8"))
+            self.result_unix = state["result_unix"]
+            self.result_ids = set(state["result_ids"])
+            self.upcoming_id = state["upcoming_id"]
+            # Watermarks of former versions have no retries yet.
+            self.retries = {
+                match_id: retries for match_id, retries in state.get("retries", list())
+            }
+
+    def is_new_result(self, match_id: int, unix: int) -> bool:
+        if self.result_unix is None or unix > self.result_unix:
+            return True
+        return unix == self.result_unix and match_id not in self.result_ids
+
+    def is_new_upcoming(self, match_id: int) -> bool:
+        return self.upcoming_id is None or match_id > self.upcoming_id
+
+    def save(self, result_unix, result_ids, upcoming_id, retries) -> None:
+        state = {
+            "result_unix": result_unix,
+            "result_ids": sorted(result_ids),
+            "upcoming_id": upcoming_id,
+            "retries": sorted(retries.items()),
+        }
+        self.path.parent.mkdir(parents=True, exist_ok=True)
+        temporary_path = self.path.with_suffix(f".{os.getpid()}.tmp")
+        temporary_path.write_text(json.dumps(state), encoding="utf-8")
+        temporary_path.replace(self.path)
+
+
+class DiscoverySpider(MatchSpider):
+    """Walks the HLTV results and upcoming matches listings and crawls the matches, which are new since the last run.
+
+    The discovered match pages are parsed by the match spider itself, so they end up in the same items and store. A
+    match counts as crawled once the ``MatchRecordPipeline`` stored its record, otherwise it is crawled again by the
+    next runs (see ``DISCOVERY_RETRY_TIMES``).
+    """
+
+    name = DISCOVERY_SPIDER_NAME
+    crawl_priority = "backfill"
+
+    @classmethod
+    def from_crawler(cls, crawler, *args, **kwargs):
+        max_pages = int(
+            kwargs.pop("max_pages", crawler.settings.getint("DISCOVERY_MAX_PAGES"))
+        )
+        listings_given = "start_urls" in kwargs
+        spider = super().from_crawler(crawler, *args, **kwargs)
+        if not listings_given:
+            spider.start_urls = crawler.settings.getlist("DISCOVERY_START_URLS")
+        spider.max_pages = max_pages
+        spider.retry_times = crawler.settings.getint("DISCOVERY_RETRY_TIMES")
+        spider.watermark = Watermark(
+            data_path(crawler.settings["DISCOVERY_WATERMARK_PATH"])
+        )
+        spider.newest_result_unix = spider.watermark.result_unix
+        spider.newest_result_ids = set(spider.watermark.result_ids)
+        spider.highest_upcoming_id = spider.watermark.upcoming_id
+        spider.requested_ids = set()
+        spider.stored_ids = set()
+        crawler.signals.connect(spider.spider_closed, signal=signals.spider_closed)
+        crawler.signals.connect(spider.record_stored, signal=pipelines.record_stored)
+        return spider
+
+    async def start(self):
+        for request in self.start_requests():
+            yield request
+
+    def start_requests(self):
+        # Also the start of Scrapy before 2.13, which does not call ``start``.
+        for url in self.start_urls:
+            yield scrapy.Request(url, dont_filter=True)
+        for match_id in self.watermark.retries:
+            yield self.__request_match(self.start_urls[0], match_id)
+
+    def record_stored(self, match_id, spider):
+        self.stored_ids.add(match_id)
+
+    def spider_closed(self, spider, reason):
+        # An interrupted run must not move the watermark past results, whose pages were never reached.
+        if reason == "finished":
+            self.watermark.save(
+                self.newest_result_unix,
+                self.newest_result_ids,
+                self.highest_upcoming_id,
+                self.get_retries(),
+            )
+
+    def get_retries(self) -> dict[int, int]:
+        """Returns the remaining retries of the requested matches, whose records were not stored by this run."""
+        retries = dict()
+        for match_id in self.requested_ids - self.stored_ids:
+            remaining = self.watermark.retries.get(match_id, self.retry_times + 1) - 1
+            if remaining > 0:
+                retries[match_id] = remaining
+            else:
+                self.logger.warning(f"Giving up on discovered match {match_id}.")
+        return retries
+
+    def __parse_results(self, response) -> list[tuple[int, int]]:
+        """Returns the match id and finish time (unix ms) of all results, ignoring the repeated featured results."""
+        results = list()
+        for result in response.css("div.results-all div.result-con"):
+            href = result.css("a.a-reset::attr(href)").get()
+            unix = result.attrib.get("data-zonedgrouping-entry-unix")
+            if href and unix and MATCH_PATH_PATTERN.match(href):
+                results.append((parse_match_id(href), int(unix)))
+        return results
+
+    def __parse_upcoming(self, response) -> list[int]:
+        # Every upcoming match is linked several times (e.g. its time and its teams), but only crawled once.
+        return list(
+            dict.fromkeys(
+                parse_match_id(href)
+                for href in response.css("a::attr(href)").getall()
+                if MATCH_PATH_PATTERN.match(href)
+            )
+        )
+
+    def __request_match(self, base_url: str, match_id: int):
+        self.requested_ids.add(match_id)
+        return scrapy.Request(
+            urljoin(base_url, f"/matches/{match_id}/match"),
+            callback=super().parse,
+            priority=1,
+        )
+
+    def parse(self, response, page: int = 1):
+        if urlparse(response.url).path.startswith("/results"):
+            yield from self.parse_results(response, page)
+        else:
+            yield from self.parse_upcoming(response)
+
+    def parse_results(self, response, page: int):
+        reached_watermark = False
+        for match_id, unix in self.__parse_results(response):
+            if not self.watermark.is_new_result(match_id, unix):
+                reached_watermark = True
+                break
+            if self.newest_result_unix is None or unix > self.newest_result_unix:
+                self.newest_result_unix = unix
+                self.newest_result_ids = {match_id}
+            elif unix == self.newest_result_unix:
+                self.newest_result_ids.add(match_id)
+            yield self.__request_match(response.url, match_id)
+
+        next_page = response.css("a.pagination-next::attr(href)").get()
+        if not reached_watermark and next_page and page < self.max_pages:
+            yield response.follow(
+                next_page, callback=self.parse, cb_kwargs={"page": page + 1}
+            )
+
+    def parse_upcoming(self, response):
+        for match_id in self.__parse_upcoming(response):
+            if self.watermark.is_new_upcoming(match_id):
+                self.highest_upcoming_id = max(self.highest_upcoming_id or 0, match_id)
+                yield self.__request_match(response.url, match_id)
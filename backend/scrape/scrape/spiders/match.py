@@ -1,20 +1,26 @@
-import copy
 import re
 from datetime import datetime as dt
-from enum import Enum
 
 import scrapy
 
+from .metadata import MATCH_SPIDER_NAME, RoundHistorySource, parse_match_id
+
 
 # TODO[HMP-TASK-?]: Add docstring(s) for everything
 class MatchSpider(scrapy.Spider):
     class MapResult:
-        class RoundHistorySource(Enum):
-            UNKNOWN = 0
-            SCOREBOARD = 1
-            STATS_PAGE = 2
+        __slots__ = (
+            "source",
+            "mapname",
+            "toppart_team_result",
+            "bottompart_team_result",
+        )
+
+        RoundHistorySource = RoundHistorySource
 
         class TeamMapResult:
+            __slots__ = ("teamname", "score", "firsthalf", "secondhalf", "overtime")
+
             def __init__(self) -> None:
                 self.teamname: str | None = None
                 self.score: int | None = None
@@ -22,6 +28,9 @@ class MatchSpider(scrapy.Spider):
                 self.secondhalf: list[bool] | None = None
                 self.overtime: list[list[bool]] | None = None
 
+            def to_dict(self):
+                return {key: getattr(self, key) for key in self.__slots__}
+
         def __init__(self) -> None:
             self.source = self.RoundHistorySource.UNKNOWN
             self.mapname: str | None = None
@@ -32,14 +41,18 @@ class MatchSpider(scrapy.Spider):
             member_dict = dict()
             member_dict.update({"source": self.source.name})
             member_dict.update({"mapname": self.mapname})
-            member_dict.update({"toppart_team_result": vars(self.toppart_team_result)})
             member_dict.update(
-                {"bottompart_team_result": vars(self.bottompart_team_result)}
+                {"toppart_team_result": self.toppart_team_result.to_dict()}
+            )
+            member_dict.update(
+                {"bottompart_team_result": self.bottompart_team_result.to_dict()}
             )
             return {"map_result": member_dict}
 
     BASE_SCRAPE_ERROR_STRING = "scrape-error"
-    name = "match"
+    name = MATCH_SPIDER_NAME
+    # Priority of the downloads at the shared token bucket: "live", "stats" or "backfill" (e.g. -a crawl_priority=...).
+    crawl_priority = "live"
 
     @classmethod
     def from_crawler(cls, crawler, *args, **kwargs):
@@ -51,7 +64,7 @@ class MatchSpider(scrapy.Spider):
         return spider
 
     def __parse_match_id(self, response) -> int:
-        return int(re.search(r"\d+", response.url).group())
+        return parse_match_id(response.url)
 
     def __parse_event(self, response) -> dict[str, str | None]:
         output = {"name": None, "datetime": None}
@@ -96,29 +109,45 @@ class MatchSpider(scrapy.Spider):
     def __parse_map_result_from_stats_link(
         self, stats_response
     ) -> dict[str, MapResult]:
-        def parse_round_history_team_row(
-            stats_response, selector: str
-        ) -> list[list[bool]]:
-            """Parses the whole round history of the team including potential overtimes."""
-            output = list()
-            history = stats_response.css(selector).xpath("child::*")
-            history_part = list()
-            for item in history:
-                node = item.get()
-                node_type = item.xpath("name()").get()
-                if node_type == "img" and "round-history-team" not in node:
-                    # TODO[HMP-TASK-?]: We might need smarter filtering for the actual win/loss condition.
-                    history_part.append(False if "empty" in node else True)
-                elif node_type == "div":
-                    output.append(copy.deepcopy(history_part))
-                    history_part.clear()
-            else:
+        def parse_round_history_team_rows(
+            stats_response,
+        ) -> tuple[list[list[bool]], list[list[bool]]]:
+            """Parses the whole round histories of both teams including potential overtimes in one pass.
+
+            The rows are told apart by their position within their parent (i.e. ":nth-child(1)" and ":nth-child(2)"),
+            and the rounds are read from the attributes of the parsed elements directly.
+            """
+            # Per team row: The separated parts of the history and the currently parsed part.
+            outputs = (list(), list())
+            history_parts = [list(), list()]
+            for row in stats_response.css("div.round-history-team-row"):
+                element = row.root
+                position = [
+                    sibling
+                    for sibling in element.getparent()
+                    if isinstance(sibling.tag, str)
+                ].index(element)
+                if position > 1:
+                    continue
+                for child in element:
+                    if child.tag == "img":
+                        attributes = " ".join(child.attrib.values())
+                        if "round-history-team" not in attributes:
+                            # TODO[HMP-TASK-?]: We might need smarter filtering for the actual win/loss condition.
+                            history_parts[position].append("empty" not in attributes)
+                    elif child.tag == "div":
+                        outputs[position].append(history_parts[position])
+                        history_parts[position] = list()
+
+            for output, history_part in zip(outputs, history_parts):
                 # Also append the parsed rounds to the output, which came after the last separating "div/vertical bar".
                 if history_part:
-                    output.append(copy.deepcopy(history_part))
+                    output.append(history_part)
 
             # We have to remove list(s) from the output to get rid of wrongly parsed data (e.g. the very start with the team logos and the div/vertical bar).
-            return list(filter(lambda elem: len(elem) > 2, output))
+            return tuple(
+                [part for part in output if len(part) > 2] for output in outputs
+            )
 
         result = self.MapResult()
         result.source = self.MapResult.RoundHistorySource.STATS_PAGE
@@ -134,10 +163,10 @@ class MatchSpider(scrapy.Spider):
                 # No special handling needed here, since all values are defaulted to None.
                 pass
 
+        toppart_round_history, bottompart_round_history = parse_round_history_team_rows(
+            stats_response
+        )
         try:
-            toppart_round_history = parse_round_history_team_row(
-                stats_response, "div.round-history-team-row:nth-child(1)"
-            )
             result.toppart_team_result.firsthalf = toppart_round_history[0]
             result.toppart_team_result.secondhalf = toppart_round_history[1]
             result.toppart_team_result.overtime = toppart_round_history[2:]
@@ -146,9 +175,6 @@ class MatchSpider(scrapy.Spider):
             pass
 
         try:
-            bottompart_round_history = parse_round_history_team_row(
-                stats_response, "div.round-history-team-row:nth-child(2)"
-            )
             result.bottompart_team_result.firsthalf = bottompart_round_history[0]
             result.bottompart_team_result.secondhalf = bottompart_round_history[1]
             result.bottompart_team_result.overtime = bottompart_round_history[2:]
@@ -174,6 +200,7 @@ class MatchSpider(scrapy.Spider):
             else:
                 output = None
             return output
+
         def parse_teamname(response, selector: str) -> str | None:
             output = response.css(selector).getall()
             if output:
@@ -232,11 +259,19 @@ class MatchSpider(scrapy.Spider):
 
         return result.to_dict()
 
+    def __parse_stats_page(self, stats_response, match_id: int):
+        return {
+            "match_id": match_id,
+            **self.__parse_map_result_from_stats_link(stats_response),
+        }
+
     def parse(self, response):
-        yield {"match_id": self.__parse_match_id(response)}
-        yield {"event": self.__parse_event(response)}
-        yield {"teams": self.__parse_teams(response)}
-        yield {"best-of": self.__parse_best_of(response)}
+        # Every fragment is tagged with its match id, so the fragments of several matches can be told apart.
+        match_id = self.__parse_match_id(response)
+        yield {"match_id": match_id}
+        yield {"match_id": match_id, "event": self.__parse_event(response)}
+        yield {"match_id": match_id, "teams": self.__parse_teams(response)}
+        yield {"match_id": match_id, "best-of": self.__parse_best_of(response)}
 
         # Inspecting different HLTV match behaviors, we assume the following:
         # - Every finished map has a "STATS" element and we crawl and parse the per round data from there.
@@ -245,9 +280,13 @@ class MatchSpider(scrapy.Spider):
             stats_link = map.css(".results-stats::attr(href)").get()
             if stats_link is not None:
                 yield scrapy.Request(
-                    url=stats_link,
-                    callback=self.__parse_map_result_from_stats_link,
+                    url=response.urljoin(stats_link),
+                    callback=self.__parse_stats_page,
+                    cb_kwargs={"match_id": match_id},
                 )
             else:
-                yield self.__parse_map_result_from_scoreboard(response)
+                yield {
+                    "match_id": match_id,
+                    **self.__parse_map_result_from_scoreboard(response),
+                }
                 break
@@ -0,0 +1,22 @@
+"""Names and helpers of the spiders, which can be imported without Scrapy, e.g. by the API on start-up."""
+
+import re
+from enum import Enum
+from urllib.parse import urlparse
+
+MATCH_SPIDER_NAME = "match"
+DISCOVERY_SPIDER_NAME = "discovery"
+
+
+class RoundHistorySource(Enum):
+    UNKNOWN = 0
+    SCOREBOARD = 1
+    STATS_PAGE = 2
+
+
+def parse_match_id(url: str) -> int:
+    # Only the path is searched, so digits of the host (e.g. an IP address) are never taken for the match id.
+    match_id = re.search(r"\d+", urlparse(url).path)
+    if match_id is None:
+        raise ValueError(f"No match id found in {url}.")
+    return int(match_id.group())
@@ -0,0 +1,124 @@
+import json
+import sqlite3
+from datetime import datetime
+
+from .compact import pack_record, unpack_record
+
+
+class MatchStore:
+    """SQLite store of the assembled match records, which are written in batched transactions.
+
+    Besides the full record, the event, datetime and team names of a match are kept in indexed columns, so that e.g.
+    all matches of a team within a time range are looked up through the index. The map results of the records are
+    stored in their compact encoding (see ``compact``).
+    """
+
+    def __init__(self, path, batch_size: int = 100) -> None:
+        self.batch_size = batch_size
+        self._pending: list[dict] = list()
+        self._connection = sqlite3.connect(path, timeout=30, check_same_thread=False)
+        with self._connection:
+            self._connection.executescript("""
+                CREATE TABLE IF NOT EXISTS matches (
+                    match_id INTEGER PRIMARY KEY,
+                    event TEXT,
+                    datetime TEXT,
+                    best_of INTEGER,
+                    record TEXT NOT NULL
+                );
+                CREATE INDEX IF NOT EXISTS matches_event ON matches (event, datetime);
+                CREATE INDEX IF NOT EXISTS matches_datetime ON matches (datetime);
+                CREATE TABLE IF NOT EXISTS match_teams (
+                    match_id INTEGER NOT NULL REFERENCES matches (match_id) ON DELETE CASCADE,
+                    team TEXT NOT NULL,
+                    datetime TEXT,
+                    PRIMARY KEY (match_id, team)
+                );
+                CREATE INDEX IF NOT EXISTS match_teams_team ON match_teams (team, datetime);
+                """)
+
+    def add(self, record: dict) -> None:
+        self._pending.append(record)
+        if len(self._pending) >= self.batch_size:
+            self.flush()
+
+    def flush(self) -> None:
+        if not self._pending:
+            return
+        match_rows = list()
+        team_rows = list()
+        for record in self._pending:
+            event = record.get("event") or dict()
+            match_rows.append(
+                (
+                    record["match_id"],
+                    event.get("name"),
+                    event.get("datetime"),
+                    record.get("best_of"),
+                    json.dumps(pack_record(record), ensure_ascii=False),
+                )
+            )
+            team_rows.extend(
+                (record["match_id"], team, event.get("datetime"))
+                for team in record.get("teams") or dict()
+            )
+        with self._connection:
+            self._connection.executemany(
+                "DELETE FROM match_teams WHERE match_id = ?",
+                [row[:1] for row in match_rows],
+            )
+            self._connection.executemany(
+                "INSERT OR REPLACE INTO matches VALUES (?, ?, ?, ?, ?)", match_rows
+            )
+            self._connection.executemany(
+                "INSERT OR REPLACE INTO match_teams VALUES (?, ?, ?)", team_rows
+            )
+        self._pending.clear()
+
+    def close(self) -> None:
+        self.flush()
+        self._connection.close()
+
+    def get(self, match_id: int) -> dict | None:
+        row = self._connection.execute(
+            "SELECT record FROM matches WHERE match_id = ?", (match_id,)
+        ).fetchone()
+        return unpack_record(json.loads(row[0])) if row else None
+
+    def find_by_team(
+        self, team: str, since: datetime | None = None, until: datetime | None = None
+    ) -> list[dict]:
+        query = (
+            "SELECT matches.record FROM match_teams JOIN matches USING (match_id) "
+            "WHERE match_teams.team = ?"
+        )
+        parameters = [team]
+        if since is not None:
+            query += " AND match_teams.datetime >= ?"
+            parameters.append(since.isoformat())
+        if until is not None:
+            query += " AND match_teams.datetime <= ?"
+            parameters.append(until.isoformat())
+        rows = self._connection.execute(
+            query + " ORDER BY match_teams.datetime", parameters
+        )
+        return [unpack_record(json.loads(record)) for (record,) in rows]
+
+    def find_by_event(self, event: str) -> list[dict]:
+        rows = self._connection.execute(
+            "SELECT record FROM matches WHERE event = ? ORDER BY datetime", (event,)
+        )
+        return [unpack_record(json.loads(record)) for (record,) in rows]
+
+    def iter_records(self, since: datetime | None = None):
+        """Yields all records ordered by their datetime, without loading the whole store into memory."""
+        query = "SELECT record FROM matches"
+        parameters = list()
+        if since is not None:
+            query += " WHERE datetime >= ?"
+            parameters.append(since.isoformat())
+        rows = self._connection.execute(
+            query + " ORDER BY datetime, match_id", parameters
+        )
+        for (record,) in rows:
+            yield unpack_record(json.loads(record))
@@ -0,0 +1,73 @@
+import scrapy
+
+from benchmarks.parsers import FIXTURES, FIXTURES_PATH, load_fixture
+from scrape.scrape.archive import PageArchive, reparse_archive
+from scrape.scrape.spiders.match import MatchSpider
+
+MATCH_ID = 2369100
+# The stats fixtures by the order of the maps on the finished match page.
+STATS_FIXTURES = ("stats_regulation", "stats_overtime")
+
+
+def archive_match(archive: PageArchive, match_id: int, stats_bodies: list[bytes]):
+    match_url = FIXTURES["match_finished_bo3"].replace(str(MATCH_ID), str(match_id))
+    archive.add(
+        match_id,
+        match_url,
+        (FIXTURES_PATH / "match_finished_bo3.html").read_bytes(),
+    )
+    stats_urls = [
+        output.url
+        for output in MatchSpider().parse(load_fixture("match_finished_bo3"))
+        if isinstance(output, scrapy.Request)
+    ]
+    for url, body in zip(stats_urls, stats_bodies):
+        archive.add(match_id, url, body)
+
+
+def test_corrupt_page_only_fails_its_match(tmp_path):
+    path = tmp_path / "archive.sqlite3"
+    archive = PageArchive(path)
+    stats_bodies = [
+        (FIXTURES_PATH / f"{name}.html").read_bytes() for name in STATS_FIXTURES
+    ]
+    archive_match(archive, 1, stats_bodies)
+    # Truncated within the score of the top team, which the spider cannot parse as a number anymore.
+    archive_match(archive, 2, [stats_bodies[0][:608], stats_bodies[1]])
+    archive_match(archive, 3, stats_bodies)
+    archive.close()
+
+    results = {
+        match_id: (record, error)
+        for match_id, record, error in reparse_archive(path, [1, 2, 3], workers=1)
+    }
+
+    assert set(results) == {1, 2, 3}
+    record, error = results[2]
+    assert record is None
+    assert error.startswith("ValueError")
+    for match_id in (1, 3):
+        record, error = results[match_id]
+        assert error is None
+        assert [
+            map_result["mapname"]
+            for map_result in record["map_results"]
+            if map_result["source"] == "STATS_PAGE"
+        ] == ["Mirage", "Inferno"]
+
+
+def test_only_the_last_version_of_a_page_is_kept(tmp_path):
+    archive = PageArchive(tmp_path / "archive.sqlite3")
+    match_url = FIXTURES["match_live"]
+    stats_url = FIXTURES["stats_regulation"]
+    # The live match page changes with every poll, while another page happens to share its first version.
+    for score in range(3):
+        archive.add(1, match_url, f"live {score}".encode())
+        if score == 0:
+            archive.add(1, stats_url, b"live 0")
+    archive.add(1, stats_url, b"stats")
+
+    assert archive.get_pages(1) == {match_url: b"live 2", stats_url: b"stats"}
+    (bodies,) = archive._connection.execute("SELECT COUNT(*) FROM bodies").fetchone()
+    assert bodies == 2
+    archive.close()
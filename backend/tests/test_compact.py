@@ -0,0 +1,54 @@
+import json
+
+from benchmarks.parsers import load_fixture
+from scrape.scrape import compact
+from scrape.scrape.spiders.match import MatchSpider
+from scrape.scrape.store import MatchStore
+
+
+def parse_map_results() -> list[dict]:
+    spider = MatchSpider()
+    return [
+        spider._MatchSpider__parse_map_result_from_stats_link(
+            load_fixture("stats_overtime")
+        )["map_result"],
+        spider._MatchSpider__parse_map_result_from_scoreboard(
+            load_fixture("match_live")
+        )["map_result"],
+        # The placeholder of a map, which was not played.
+        MatchSpider.MapResult().to_dict()["map_result"],
+    ]
+
+
+def test_rounds_round_trip():
+    for rounds in (None, list(), [True], [False, False], [True, False, False] * 5):
+        assert compact.unpack_rounds(compact.pack_rounds(rounds)) == rounds
+    assert compact.pack_rounds([True, False, False]) == "9"
+
+
+def test_map_results_round_trip():
+    for map_result in parse_map_results():
+        packed = json.loads(json.dumps(compact.pack_map_result(map_result)))
+        assert compact.unpack_map_result(packed) == map_result
+
+
+def test_store_keeps_compact_and_former_records(tmp_path):
+    map_results = parse_map_results()
+    record = {"match_id": 1, "teams": {"G2": list()}, "map_results": map_results}
+    store = MatchStore(tmp_path / "matches.sqlite3")
+    store.add(record)
+    store.flush()
+    # A record, which was stored before the compact encoding.
+    with store._connection:
+        store._connection.execute(
+            "INSERT INTO matches VALUES (2, NULL, NULL, NULL, ?)",
+            (json.dumps({**record, "match_id": 2}),),
+        )
+    (stored,) = store._connection.execute(
+        "SELECT record FROM matches WHERE match_id = 1"
+    ).fetchone()
+    assert len(stored) < len(json.dumps(record))
+
+    assert store.get(1) == record
+    assert store.get(2) == {**record, "match_id": 2}
+    store.close()
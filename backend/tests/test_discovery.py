@@ -0,0 +1,117 @@
+import scrapy
+from scrapy.crawler import Crawler
+
+from api.engine import load_project_settings
+from benchmarks.parsers import load_fixture
+from scrape.scrape import pipelines
+from scrape.scrape.spiders.discovery import DiscoverySpider, Watermark
+from scrape.scrape.spiders.metadata import parse_match_id
+
+# The second result of the listing fixture, which is preceded by one newer result.
+WATERMARK_UNIX = 1707597815000
+WATERMARK_ID = 2369157
+
+
+def create_spider(tmp_path, **settings):
+    settings = load_project_settings(
+        {"DISCOVERY_WATERMARK_PATH": str(tmp_path / "watermark.json"), **settings}
+    )
+    crawler = Crawler(DiscoverySpider, settings)
+    return crawler, DiscoverySpider.from_crawler(crawler)
+
+
+def split_outputs(outputs) -> tuple[list[int], list[str]]:
+    """Returns the ids of the requested matches and the URLs of the requested listing pages."""
+    match_ids, listing_urls = list(), list()
+    for output in outputs:
+        assert isinstance(output, scrapy.Request)
+        if "/matches/" in output.url:
+            match_ids.append(parse_match_id(output.url))
+        else:
+            listing_urls.append(output.url)
+    return match_ids, listing_urls
+
+
+def test_start_urls_from_settings(tmp_path):
+    listings = ["http://127.0.0.1:8800/results", "http://127.0.0.1:8800/matches"]
+    _, spider = create_spider(tmp_path, DISCOVERY_START_URLS=listings)
+    assert spider.start_urls == listings
+
+
+def test_results_follow_the_next_page_without_watermark(tmp_path):
+    _, spider = create_spider(tmp_path)
+    match_ids, listing_urls = split_outputs(
+        spider.parse(load_fixture("listing_results"))
+    )
+    assert len(match_ids) == len(set(match_ids)) == 100
+    assert match_ids[:2] == [2369160, WATERMARK_ID]
+    assert listing_urls == ["https://www.hltv.org/results?offset=100"]
+
+    _, spider = create_spider(tmp_path, DISCOVERY_MAX_PAGES=1)
+    _, listing_urls = split_outputs(spider.parse(load_fixture("listing_results")))
+    assert listing_urls == list()
+
+
+def test_results_stop_at_the_watermark(tmp_path):
+    Watermark(tmp_path / "watermark.json").save(
+        WATERMARK_UNIX, {WATERMARK_ID}, None, dict()
+    )
+    _, spider = create_spider(tmp_path)
+    match_ids, listing_urls = split_outputs(
+        spider.parse(load_fixture("listing_results"))
+    )
+    assert match_ids == [2369160]
+    assert listing_urls == list()
+
+    # Another result, which finished at the watermark time, was not crawled yet.
+    Watermark(tmp_path / "watermark.json").save(WATERMARK_UNIX, {1}, None, dict())
+    _, spider = create_spider(tmp_path)
+    match_ids, listing_urls = split_outputs(
+        spider.parse(load_fixture("listing_results"))
+    )
+    assert match_ids == [2369160, WATERMARK_ID]
+    assert listing_urls == list()
+
+
+def test_upcoming_matches_are_requested_once(tmp_path):
+    _, spider = create_spider(tmp_path)
+    match_ids, _ = split_outputs(spider.parse(load_fixture("listing_upcoming")))
+    assert len(match_ids) == len(set(match_ids)) == 25
+
+    Watermark(tmp_path / "watermark.json").save(None, set(), 2369200, dict())
+    _, spider = create_spider(tmp_path)
+    match_ids, _ = split_outputs(spider.parse(load_fixture("listing_upcoming")))
+    assert match_ids == [
+        2369201,
+        2369202,
+        2369203,
+        2369206,
+        2369207,
+        2369208,
+        2369209,
+        2369211,
+        2369213,
+    ]
+
+
+def test_unstored_matches_are_retried(tmp_path):
+    crawler, spider = create_spider(tmp_path, DISCOVERY_RETRY_TIMES=1)
+    match_ids, _ = split_outputs(spider.parse(load_fixture("listing_results")))
+    for match_id in match_ids[1:]:
+        crawler.signals.send_catch_log(
+            signal=pipelines.record_stored, match_id=match_id, spider=spider
+        )
+    spider.spider_closed(spider, "finished")
+
+    watermark = Watermark(tmp_path / "watermark.json")
+    assert watermark.result_unix == 1707598800000
+    assert watermark.result_ids == {2369160}
+    assert watermark.retries == {2369160: 1}
+
+    # The retry is requested after the listings, and given up once it failed again.
+    _, spider = create_spider(tmp_path, DISCOVERY_RETRY_TIMES=1)
+    match_ids, listing_urls = split_outputs(spider.start_requests())
+    assert match_ids == [2369160]
+    assert listing_urls == spider.start_urls
+    spider.spider_closed(spider, "finished")
+    assert Watermark(tmp_path / "watermark.json").retries == dict()
@@ -0,0 +1,60 @@
+from email.utils import formatdate
+from hashlib import sha256
+from time import time
+from types import SimpleNamespace
+
+from scrapy.http import HtmlResponse, Request
+from scrapy.utils.request import RequestFingerprinter
+
+from api.engine import load_project_settings
+from scrape.scrape.httpcache import ContentAddressedCacheStorage, HltvCachePolicy
+
+# A match page, which is fresh for 15 seconds (see HTTPCACHE_MAX_AGE_BY_URL).
+MATCH_URL = "https://www.hltv.org/matches/2369100/vitality-vs-faze-iem-katowice-2024"
+
+
+def is_fresh(headers: dict, cache_timestamp: float | None) -> bool:
+    request = Request(MATCH_URL)
+    if cache_timestamp is not None:
+        request.meta["cache_timestamp"] = cache_timestamp
+    response = HtmlResponse(MATCH_URL, headers=headers, body=b"")
+    return HltvCachePolicy(load_project_settings()).is_cached_response_fresh(
+        response, request
+    )
+
+
+def test_freshness_by_date_header():
+    assert is_fresh({"Date": formatdate(time() - 1, usegmt=True)}, None)
+    assert not is_fresh({"Date": formatdate(time() - 100, usegmt=True)}, time())
+
+
+def test_freshness_by_cache_timestamp_without_date_header():
+    assert is_fresh(dict(), time() - 1)
+    assert not is_fresh(dict(), time() - 100)
+    assert not is_fresh({"Date": "not a date"}, time() - 100)
+    assert not is_fresh(dict(), None)
+
+
+def test_storage_removes_orphaned_bodies(tmp_path):
+    settings = load_project_settings({"HTTPCACHE_DIR": str(tmp_path)})
+    spider = SimpleNamespace(
+        crawler=SimpleNamespace(request_fingerprinter=RequestFingerprinter())
+    )
+    storage = ContentAddressedCacheStorage(settings)
+    storage.open_spider(spider)
+
+    def store(url: str, body: bytes) -> None:
+        storage.store_response(spider, Request(url), HtmlResponse(url, body=body))
+
+    def get_blobs() -> set[str]:
+        return {path.stem for path in (tmp_path / "blobs").glob("*/*.z")}
+
+    store(MATCH_URL, b"live")
+    store(MATCH_URL + "?other", b"live")
+    store(MATCH_URL, b"finished")
+    # The former body of the match page is still the body of the other page.
+    assert get_blobs() == {sha256(b"live").hexdigest(), sha256(b"finished").hexdigest()}
+    store(MATCH_URL + "?other", b"finished")
+    assert get_blobs() == {sha256(b"finished").hexdigest()}
+    assert storage.retrieve_response(spider, Request(MATCH_URL)).body == b"finished"
+    storage._connection.close()
@@ -0,0 +1,42 @@
+from api import common, engine, live
+
+MATCH_URL = "https://www.hltv.org/matches/2369100/vitality-vs-faze-iem-katowice-2024"
+
+
+def collect_events(monkeypatch, parse_match) -> list[str]:
+    monkeypatch.setattr(common, "parse_match", parse_match)
+    tracker = live.LiveTracker(interval=0.01)
+    events = [
+        message.splitlines()[0]
+        for message in tracker.stream(MATCH_URL, keepalive=5)
+        if not message.startswith(":")
+    ]
+    assert tracker.match_count == 0
+    return events
+
+
+def test_failed_crawls_are_polled_again(monkeypatch):
+    polls = list()
+
+    def parse_match(url, refresh=False):
+        polls.append(url)
+        if len(polls) < 3:
+            raise engine.CrawlError("No items could be scraped.")
+        return [{"match_id": 2369100}]
+
+    # Without a live map, the match is finished.
+    assert collect_events(monkeypatch, parse_match) == [
+        "event: error",
+        "event: error",
+        "event: finished",
+    ]
+
+
+def test_unexpected_errors_close_the_subscribers(monkeypatch):
+    def parse_match(url, refresh=False):
+        raise ValueError("invalid literal for int() with base 10: ''")
+
+    assert collect_events(monkeypatch, parse_match) == [
+        "event: error",
+        "event: closed",
+    ]
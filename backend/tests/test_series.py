@@ -0,0 +1,79 @@
+from benchmarks.parsers import load_fixture
+from predict.series import get_first_half_teams, get_map_score, get_top_team_rounds
+from predict.simulate import get_series_state
+from scrape.scrape.spiders.match import MatchSpider
+
+
+def parse_live_map() -> dict:
+    response = load_fixture("match_live")
+    spider = MatchSpider()
+    return spider._MatchSpider__parse_map_result_from_scoreboard(response)["map_result"]
+
+
+def get_team_result(teamname: str, score: int, firsthalf, secondhalf) -> dict:
+    return {
+        "teamname": teamname,
+        "score": score,
+        "firsthalf": firsthalf,
+        "secondhalf": secondhalf,
+        "overtime": None,
+    }
+
+
+def get_record(map_result: dict, teams=("Natus Vincere", "G2")) -> dict:
+    return {
+        "match_id": 1,
+        "teams": {teamname: list() for teamname in teams},
+        "best_of": 3,
+        "map_results": [map_result],
+    }
+
+
+def test_second_half_score_follows_the_side_switch():
+    # Natus Vincere is CT at the top of the scoreboard in the second half, but was T at the bottom in the first one.
+    map_result = parse_live_map()
+    assert get_first_half_teams(map_result) == ("G2", "Natus Vincere")
+
+    rounds = get_top_team_rounds(map_result)
+    assert (sum(rounds), len(rounds) - sum(rounds)) == (11, 6)
+    assert get_map_score(map_result, "Natus Vincere") == (6, 11)
+    assert get_series_state(get_record(map_result))["live_map"]["score"] == (6, 11)
+    state = get_series_state(get_record(map_result, teams=("G2", "Natus Vincere")))
+    assert state["live_map"]["score"] == (11, 6)
+
+
+def test_first_half_perspective_is_the_top_team():
+    map_result = {
+        "source": "SCOREBOARD",
+        "mapname": "Inferno",
+        "toppart_team_result": get_team_result("G2", 3, [True, False, True, True], []),
+        "bottompart_team_result": get_team_result(
+            "Natus Vincere", 1, [False, True, False, False], []
+        ),
+    }
+    assert get_first_half_teams(map_result) == ("G2", "Natus Vincere")
+    assert get_map_score(map_result, "Natus Vincere") == (1, 3)
+
+
+def test_overtime_score_is_read_from_the_scores():
+    # The round history of the scoreboard ends with regulation at 12:12, only the scores count the overtime.
+    top_rounds = [True, False] * 6
+    map_result = {
+        "source": "SCOREBOARD",
+        "mapname": "Nuke",
+        "toppart_team_result": get_team_result(
+            "Natus Vincere", 16, top_rounds, top_rounds
+        ),
+        "bottompart_team_result": get_team_result(
+            "G2",
+            14,
+            [not won for won in top_rounds],
+            [not won for won in top_rounds],
+        ),
+    }
+    assert len(get_top_team_rounds(map_result)) == 24
+    assert get_first_half_teams(map_result) == ("G2", "Natus Vincere")
+    assert get_map_score(map_result, "Natus Vincere") == (16, 14)
+    assert get_map_score(map_result, "G2") == (14, 16)
+    state = get_series_state(get_record(map_result, teams=("G2", "Natus Vincere")))
+    assert state["live_map"]["score"] == (14, 16)